@@ -1,51 +1,207 @@
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application,
+    BaseUpdateProcessor,
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
     ContextTypes,
     filters
 )
-import json
+from telegram.request import HTTPXRequest
+import orjson
+import bisect
+import difflib
+import functools
+import hashlib
+import heapq
+import operator
 import logging
 import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Set, Tuple
 from ..core.config import settings
 from ..core.rag import EnhancedRAGSystem
 from .twitter_bot import TwitterManager
 from ..core.content_advisor import ContentAdvisor
 from ..core.database import AsyncSessionLocal
+from ..core.uploads import UPLOAD_DIR, record_uploads, secure_filename, stored_name
 
-# Set up logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 logger = logging.getLogger(__name__)
 
+# Maximum number of answered questions kept in memory, and seconds each answer
+# stays fresh so admin-app uploads (which this process never sees) show up
+ANSWER_CACHE_SIZE = 1024
+ANSWER_CACHE_TTL = 600
+
+# Confidence thresholds and the label for each band they delimit
+CONFIDENCE_BINS = (0.7, 0.9)
+CONFIDENCE_LABELS = ("🔴 Low Confidence", "🟡 Moderate Confidence", "🟢 High Confidence")
+ANSWER_TEMPLATE = "{answer}\n\n{label}"
+
+# Seconds between progress updates while a document is being embedded
+PROGRESS_INTERVAL = 5
+
+TWEET_CREATED_TEMPLATE = (
+    "📝 Draft Tweet Created!\n\n"
+    "Content: {content}\n\n"
+    "Available Commands:\n"
+    "/improve - Get AI suggestions\n"
+    "/preview - View current draft\n"
+    "/update <text> - Update draft content\n"
+    "/publish - Post the tweet"
+)
+
+NO_MATCH_TEMPLATE = (
+    "❌ No members found with the specified skills.\n\n"
+    "Available skills in our database:\n"
+    "🔹 {skills}\n\n"
+    "Try searching with one of these skills!"
+)
+
+# Matches shown by /find plus the "Show More Members" page
+MAX_MATCHES = 6
+
+# Closest known skills tried for a search term with no prefix match, and how
+# similar (0-1) a skill must be to count as a typo of the term
+SKILL_TYPO_MATCHES = 3
+SKILL_TYPO_CUTOFF = 0.75
+
+_match_count = operator.itemgetter('match_count')
+
+@functools.lru_cache(maxsize=4096)
+def _norm(skill: str) -> str:
+    """Normalize a skill name for case-insensitive matching"""
+    return skill.casefold()
+
+class _PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Process updates concurrently across chats but in arrival order within a chat"""
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # Chat id -> (lock, updates holding or waiting for it); dropped when idle
+        self._chats: Dict[int, Tuple[asyncio.Lock, int]] = {}
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Run an update's handlers after any earlier updates from the same chat"""
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await coroutine
+            return
+
+        # Locks wake waiters in FIFO order, so e.g. /tweet then /update from
+        # one user always reach the draft store in that order
+        lock, users = self._chats.get(chat.id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._chats[chat.id] = (lock, users + 1)
+        try:
+            async with lock:
+                await coroutine
+        finally:
+            lock, users = self._chats[chat.id]
+            if users == 1:
+                del self._chats[chat.id]
+            else:
+                self._chats[chat.id] = (lock, users - 1)
+
+    async def initialize(self) -> None:
+        """Nothing to set up"""
+
+    async def shutdown(self) -> None:
+        """Nothing to tear down"""
+
 class SuperteamBot:
+    # Parsed members.json keyed by (path, mtime_ns), shared across instances
+    _members_cache: Dict[Tuple[str, int], List[Dict]] = {}
+
+    _WELCOME_TEXT = (
+        "👋 Welcome to Superteam Vietnam Bot!\n\n"
+        "I can help you with:\n"
+        "🔍 Finding team members\n"
+        "📚 Answering questions about Superteam\n"
+        "💡 Getting information about our projects\n\n"
+        "Use /help to see available commands!"
+    )
+
+    _START_MARKUP = InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("Find Members 🔍", callback_data="find_members"),
+            InlineKeyboardButton("Ask Questions ❓", callback_data="ask_questions")
+        ],
+        [InlineKeyboardButton("Help 📖", callback_data="help")]
+    ])
+
+    _HELP_TEXT = (
+        "🤖 Available Commands:\n\n"
+        "/start - Start the bot\n"
+        "/help - Show this help message\n"
+        "/find <skills> - Find team members by skills\n"
+        "Example: /find rust defi (prefixes like 'sol' work too)\n\n"
+        "For Admins:\n"
+        "/upload - Upload documents to knowledge base\n"
+        "/tweet <text> - Create a new tweet draft\n"
+        "/preview - View current tweet draft\n"
+        "/improve - Get suggestions for current draft\n"
+        "/update <text> - Update draft content\n"
+        "/publish - Post the tweet\n"
+        "/optimize <text> - Optimize content\n"
+        "/abtest <text> - Create A/B test variants\n\n"
+        "❓ Ask me anything about Superteam Vietnam!\n"
+        "Just type your question, and I'll help you find the answer."
+    )
+
     def __init__(self):
         """Initialize the bot with token from settings"""
-        self.application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+        # Keep-alive connection pools so API calls reuse connections instead of re-handshaking
+        request = HTTPXRequest(
+            connection_pool_size=settings.TELEGRAM_CONNECTION_POOL_SIZE,
+            connect_timeout=5.0,
+            read_timeout=30.0,
+            write_timeout=30.0,
+            pool_timeout=1.0
+        )
+        # getUpdates long-polls on its own connection so it never waits on the shared pool
+        get_updates_request = HTTPXRequest(connection_pool_size=1, read_timeout=40.0)
+        self.application = (
+            Application.builder()
+            .token(settings.TELEGRAM_BOT_TOKEN)
+            .request(request)
+            .get_updates_request(get_updates_request)
+            .concurrent_updates(_PerChatUpdateProcessor(settings.TELEGRAM_CONCURRENT_UPDATES))
+            .post_shutdown(self._on_shutdown)
+            .build()
+        )
         self.rag_system = EnhancedRAGSystem()
         self.twitter_manager = TwitterManager(self.rag_system)
+        self.advisor = ContentAdvisor(self.rag_system, AsyncSessionLocal)
+        self._answer_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._embed_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embed")
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
         self._setup_handlers()
         
         # Load member database
         self.members_db = self._load_members_db()
+        self._build_skill_index()
+        self._build_member_cards()
         logger.info(f"Loaded {len(self.members_db)} members from database")
 
     def _load_members_db(self):
-        """Load member database from JSON file"""
+        """Load member database from JSON file, reusing the parsed data while the file is unchanged"""
         try:
             db_path = Path("data/members.json")
             logger.info(f"Loading members from: {db_path.absolute()}")
             if db_path.exists():
-                with open(db_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data
+                cache_key = (str(db_path.absolute()), db_path.stat().st_mtime_ns)
+                if cache_key not in self._members_cache:
+                    self._members_cache.clear()
+                    self._members_cache[cache_key] = orjson.loads(db_path.read_bytes())
+                return self._members_cache[cache_key]
             else:
                 logger.warning(f"Members database not found at {db_path.absolute()}")
             return []
@@ -53,6 +209,94 @@ class SuperteamBot:
             logger.error(f"Error loading members database: {e}")
             return []
 
+    def _build_skill_index(self):
+        """Build normalized skill -> member index lookup tables from the member database"""
+        self._skill_index: Dict[str, List[int]] = {}
+        self._member_skills_lower: List[FrozenSet[str]] = []
+
+        for idx, member in enumerate(self.members_db):
+            skills = frozenset(_norm(skill) for skill in member.get('skills', []))
+            self._member_skills_lower.append(skills)
+            for skill in skills:
+                self._skill_index.setdefault(skill, []).append(idx)
+
+        self._all_skills_sorted = sorted(self._skill_index)
+        self._no_match_message = NO_MATCH_TEMPLATE.format(
+            skills=", ".join(self._all_skills_sorted)
+        )
+
+    def _build_member_cards(self):
+        """Pre-render the static part of each member's search result entry"""
+        self._member_cards: List[str] = [
+            f"🌟 Projects: {', '.join(member.get('projects', []))}\n"
+            f"{'✅ Available' if member.get('availability', True) else '❌ Not Available'}\n"
+            f"🔗 Telegram: @{member.get('telegram_id', 'N/A')}\n"
+            f"🐦 Twitter: {member.get('twitter_handle', 'N/A')}\n\n"
+            for member in self.members_db
+        ]
+
+    def _format_member_matches(self, matches: List[Dict], start: int) -> str:
+        """Render member matches as numbered result entries starting at the given index"""
+        parts = []
+        for idx, match in enumerate(matches, start):
+            parts.append(
+                f"{idx}. 👤 {match['member']['name']}\n"
+                f"📝 Matching skills: {', '.join(match['matching_skills'])}\n"
+            )
+            parts.append(self._member_cards[match['index']])
+        return "".join(parts)
+
+    def _expand_skill_prefix(self, prefix: str) -> List[str]:
+        """Return all known skills starting with the given normalized prefix, or the closest spellings"""
+        start = bisect.bisect_left(self._all_skills_sorted, prefix)
+        end = start
+        while end < len(self._all_skills_sorted) and self._all_skills_sorted[end].startswith(prefix):
+            end += 1
+        if end > start:
+            return self._all_skills_sorted[start:end]
+        # No prefix match: treat the term as a possible typo of a known skill
+        return difflib.get_close_matches(
+            prefix, self._all_skills_sorted, n=SKILL_TYPO_MATCHES, cutoff=SKILL_TYPO_CUTOFF
+        )
+
+    def _match_members(self, search_skills: Set[str], limit: int = MAX_MATCHES) -> List[Dict]:
+        """Find up to `limit` members matching the given normalized skills or skill prefixes, best matches first"""
+        # Each search term may expand to several skills; members are ranked by how
+        # many of the terms they satisfy, not how many expanded skills they have
+        expansions = [frozenset(self._expand_skill_prefix(prefix)) for prefix in search_skills]
+        expansions = [skills for skills in expansions if skills]
+        all_skills = frozenset().union(*expansions)
+
+        if len(all_skills) == 1:
+            # Every indexed member has the only skill, no intersection needed
+            (skill,) = all_skills
+            return [
+                {
+                    'index': idx,
+                    'member': self.members_db[idx],
+                    'matching_skills': all_skills,
+                    'match_count': 1
+                }
+                for idx in self._skill_index[skill][:limit]
+            ]
+
+        candidate_ids = set().union(
+            *(self._skill_index.get(skill, ()) for skill in all_skills)
+        )
+
+        matches = []
+        for idx in sorted(candidate_ids):
+            member_skills = self._member_skills_lower[idx]
+            matching_skills = all_skills & member_skills
+            matches.append({
+                'index': idx,
+                'member': self.members_db[idx],
+                'matching_skills': matching_skills,
+                'match_count': sum(1 for skills in expansions if not skills.isdisjoint(member_skills))
+            })
+
+        return heapq.nlargest(limit, matches, key=_match_count)
+
     def _setup_handlers(self):
         """Set up bot command and message handlers"""
         # Command handlers
@@ -76,60 +320,36 @@ class SuperteamBot:
         self.application.add_handler(MessageHandler(filters.Document.ALL, self.handle_document))
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
         
-        # Callback query handler for inline buttons
+        # Callback query handler for inline buttons, dispatched on callback data
+        self._cb_exact = {
+            "find_members": self._cb_find_members,
+            "ask_questions": self._cb_ask_questions,
+            "help": self.help_command,
+        }
+        self._cb_prefixes = (
+            ("more_members_", self._cb_more_members),
+            ("use_variant_", self._cb_use_variant),
+        )
         self.application.add_handler(CallbackQueryHandler(self.handle_callback))
         
         # Error handler
         self.application.add_error_handler(self.error_handler)
 
+    def _require_admin(self, update: Update) -> bool:
+        """Check whether the update was sent by a configured admin"""
+        return settings.is_admin(update.effective_user.id)
+
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
-        welcome_message = (
-            "👋 Welcome to Superteam Vietnam Bot!\n\n"
-            "I can help you with:\n"
-            "🔍 Finding team members\n"
-            "📚 Answering questions about Superteam\n"
-            "💡 Getting information about our projects\n\n"
-            "Use /help to see available commands!"
-        )
-        
-        keyboard = [
-            [
-                InlineKeyboardButton("Find Members 🔍", callback_data="find_members"),
-                InlineKeyboardButton("Ask Questions ❓", callback_data="ask_questions")
-            ],
-            [InlineKeyboardButton("Help 📖", callback_data="help")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(welcome_message, reply_markup=reply_markup)
+        await update.message.reply_text(self._WELCOME_TEXT, reply_markup=self._START_MARKUP)
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /help command"""
-        help_text = (
-            "🤖 Available Commands:\n\n"
-            "/start - Start the bot\n"
-            "/help - Show this help message\n"
-            "/find <skills> - Find team members by skills\n"
-            "Example: /find rust defi\n\n"
-            "For Admins:\n"
-            "/upload - Upload documents to knowledge base\n"
-            "/tweet <text> - Create a new tweet draft\n"
-            "/preview - View current tweet draft\n"
-            "/improve - Get suggestions for current draft\n"
-            "/update <text> - Update draft content\n"
-            "/publish - Post the tweet\n"
-            "/optimize <text> - Optimize content\n"
-            "/abtest <text> - Create A/B test variants\n\n"
-            "❓ Ask me anything about Superteam Vietnam!\n"
-            "Just type your question, and I'll help you find the answer."
-        )
-        await update.message.reply_text(help_text)
+        await update.message.reply_text(self._HELP_TEXT)
 
     async def upload_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /upload command"""
-        user_id = str(update.effective_user.id)
-        if user_id not in settings.admin_ids:
+        if not self._require_admin(update):
             await update.message.reply_text("⚠️ Sorry, only admins can upload documents.")
             return
         
@@ -147,47 +367,14 @@ class SuperteamBot:
             )
             return
 
-        search_skills = [skill.lower() for skill in context.args]
-        matches = []
-
-        for member in self.members_db:
-            member_skills = [skill.lower() for skill in member.get('skills', [])]
-            matching_skills = set(search_skills) & set(member_skills)
-            
-            if matching_skills:
-                matches.append({
-                    'member': member,
-                    'matching_skills': matching_skills,
-                    'match_count': len(matching_skills)
-                })
+        search_skills = [_norm(skill) for skill in context.args]
+        matches = self._match_members(set(search_skills))
 
         if not matches:
-            all_skills = set()
-            for member in self.members_db:
-                all_skills.update(skill.lower() for skill in member.get('skills', []))
-            
-            no_match_message = (
-                "❌ No members found with the specified skills.\n\n"
-                "Available skills in our database:\n"
-                f"🔹 {', '.join(sorted(all_skills))}\n\n"
-                "Try searching with one of these skills!"
-            )
-            await update.message.reply_text(no_match_message)
+            await update.message.reply_text(self._no_match_message)
             return
 
-        matches.sort(key=lambda x: x['match_count'], reverse=True)
-        
-        response = "🔍 Found matching members:\n\n"
-        for idx, match in enumerate(matches[:3], 1):
-            member = match['member']
-            response += (
-                f"{idx}. 👤 {member['name']}\n"
-                f"📝 Matching skills: {', '.join(match['matching_skills'])}\n"
-                f"🌟 Projects: {', '.join(member['projects'])}\n"
-                f"{'✅ Available' if member.get('availability', True) else '❌ Not Available'}\n"
-                f"🔗 Telegram: @{member.get('telegram_id', 'N/A')}\n"
-                f"🐦 Twitter: {member.get('twitter_handle', 'N/A')}\n\n"
-            )
+        response = "🔍 Found matching members:\n\n" + self._format_member_matches(matches[:3], 1)
 
         keyboard = []
         if len(matches) > 3:
@@ -201,11 +388,12 @@ class SuperteamBot:
 
     async def handle_document(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle document uploads"""
-        user_id = str(update.effective_user.id)
-        if user_id not in settings.admin_ids:
+        if not self._require_admin(update):
             await update.message.reply_text("⚠️ Sorry, only admins can upload documents.")
             return
 
+        user_id = str(update.effective_user.id)
+
         try:
             document = update.message.document
             logger.info(f"Received document: {document.file_name}")
@@ -221,33 +409,60 @@ class SuperteamBot:
             processing_msg = await update.message.reply_text("📥 Downloading document...")
             file = await document.get_file()
             
-            upload_dir = Path("data/uploads")
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            
-            file_path = upload_dir / document.file_name
-            await file.download_to_drive(str(file_path))
+            buffer = BytesIO()
+            await file.download_to_memory(out=buffer)
+            data = buffer.getvalue()
             
             await processing_msg.edit_text("📄 Reading document content...")
             
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    logger.info(f"Successfully read file, content length: {len(content)}")
+                content = data.decode('utf-8')
+                logger.info(f"Successfully read file, content length: {len(content)}")
             except UnicodeDecodeError:
                 await processing_msg.edit_text("❌ Error: File must be in UTF-8 text format.")
                 return
+
+            # Identical content is embedded only once, as in the admin app
+            digest = hashlib.sha256(data).hexdigest()
+            if await asyncio.to_thread(self.rag_system.has_digest, digest):
+                await processing_msg.edit_text("ℹ️ This document is already in the knowledge base.")
+                return
                 
             # Add to knowledge base
             await processing_msg.edit_text("🔄 Processing and adding to knowledge base...")
+            filename = secure_filename(document.file_name)
             metadata = {
-                "filename": document.file_name,
+                "title": document.file_name,
+                "description": update.message.caption or "Uploaded via Telegram",
+                "filename": filename,
                 "uploaded_by": user_id,
-                "date": str(update.message.date)
+                "date": str(update.message.date),
+                "digest": digest
             }
             
-            success = await self.rag_system.add_document(content, metadata)
+            heartbeat = asyncio.create_task(self._progress_heartbeat(
+                processing_msg, "🔄 Processing and adding to knowledge base..."
+            ))
+            try:
+                success = await asyncio.get_running_loop().run_in_executor(
+                    self._embed_pool, self.rag_system.add_document_sync, content, metadata
+                )
+            finally:
+                heartbeat.cancel()
             
             if success:
+                # New knowledge may change previous answers
+                self._answer_cache.clear()
+                # Store and index a copy the same way the admin app does, without delaying the reply
+                entry = {
+                    **metadata,
+                    "stored_as": stored_name(digest, filename),
+                    "size": len(data),
+                    "modified": update.message.date.timestamp()
+                }
+                task = asyncio.create_task(asyncio.to_thread(self._save_upload, entry, data))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
                 await processing_msg.edit_text(
                     "✅ Document successfully added to the knowledge base!"
                 )
@@ -262,6 +477,27 @@ class SuperteamBot:
                 "❌ Error processing the document. Please make sure it's a valid text file."
             )
 
+    async def _progress_heartbeat(self, message, text: str):
+        """Periodically edit a status message so users can see work is still running"""
+        elapsed = 0
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            elapsed += PROGRESS_INTERVAL
+            try:
+                await message.edit_text(f"{text} ({elapsed}s)")
+            except Exception as e:
+                logger.warning(f"Failed to update progress message: {e}")
+
+    @staticmethod
+    def _save_upload(entry: Dict, data: bytes):
+        """Write an ingested document to the uploads directory and record it in the upload index"""
+        try:
+            UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+            (UPLOAD_DIR / entry["stored_as"]).write_bytes(data)
+            record_uploads([entry])
+        except Exception as e:
+            logger.error(f"Error saving uploaded document {entry['filename']}: {e}")
+
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle general messages and questions"""
         text = update.message.text
@@ -271,18 +507,12 @@ class SuperteamBot:
         )
         
         try:
-            result = await self.rag_system.query(text)
-            answer = result["answer"]
-            confidence = result["confidence"]
-            
-            if confidence >= 0.9:
-                confidence_indicator = "🟢 High Confidence"
-            elif confidence >= 0.7:
-                confidence_indicator = "🟡 Moderate Confidence"
-            else:
-                confidence_indicator = "🔴 Low Confidence"
+            result = await self._cached_query(text)
+            confidence_indicator = CONFIDENCE_LABELS[
+                bisect.bisect_right(CONFIDENCE_BINS, result["confidence"])
+            ]
             
-            response = f"{answer}\n\n{confidence_indicator}"
+            response = ANSWER_TEMPLATE.format(answer=result["answer"], label=confidence_indicator)
             await processing_message.edit_text(response)
             
         except Exception as e:
@@ -291,13 +521,42 @@ class SuperteamBot:
                 "❌ Sorry, I encountered an error. Please try again later."
             )
 
+    async def _single_flight(self, key: Tuple, coro_factory: Callable[[], Awaitable]):
+        """Run coro_factory once per key, sharing the result with concurrent callers"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(coro_factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled caller doesn't cancel the work for everyone else
+        return await asyncio.shield(task)
+
+    async def _cached_query(self, text: str) -> Dict:
+        """Query the RAG system, reusing answers for previously asked questions"""
+        key = " ".join(text.lower().split())
+        cached = self._answer_cache.get(key)
+        if cached is not None:
+            stored_at, answer = cached
+            if time.monotonic() - stored_at < ANSWER_CACHE_TTL:
+                self._answer_cache.move_to_end(key)
+                return answer
+            del self._answer_cache[key]
+
+        result = await self._single_flight(("query", key), lambda: self.rag_system.query(text))
+        # Zero confidence means no context or an error; don't pin those answers
+        if result["confidence"] > 0:
+            self._answer_cache[key] = (time.monotonic(), result)
+            if len(self._answer_cache) > ANSWER_CACHE_SIZE:
+                self._answer_cache.popitem(last=False)
+        return result
+
     async def optimize_message(self, message: str) -> Dict:
         """Optimize a message using ContentAdvisor"""
         try:
-            async with AsyncSessionLocal() as session:
-                advisor = ContentAdvisor(self.rag_system, session)
-                result = await advisor.optimize_content(message, "telegram")
-                return result
+            key = ("optimize", " ".join(message.split()))
+            return await self._single_flight(
+                key, lambda: self.advisor.optimize_content(message, "telegram")
+            )
         except Exception as e:
             logger.error(f"Error optimizing message: {e}")
             return {
@@ -320,23 +579,21 @@ class SuperteamBot:
         result = await self.optimize_message(content)
         
         if result["status"] == "success":
-            response = (
+            parts = [
                 "✨ Content Optimization Results:\n\n"
                 f"Original: {content}\n\n"
                 f"Optimized: {result['optimized_content']}\n\n"
                 "Suggestions:\n"
-            )
-            for suggestion in result["suggestions"]:
-                response += f"• {suggestion}\n"
+            ]
+            parts.extend(f"• {suggestion}\n" for suggestion in result["suggestions"])
                 
             if result["tags"]["hashtags"]:
-                response += "\nRecommended Hashtags:\n"
-                for hashtag in result["tags"]["hashtags"]:
-                    response += f"• {hashtag}\n"
+                parts.append("\nRecommended Hashtags:\n")
+                parts.extend(f"• {hashtag}\n" for hashtag in result["tags"]["hashtags"])
                     
-            response += f"\nEngagement Score: {result['metrics']['engagement_score']}/100"
+            parts.append(f"\nEngagement Score: {result['metrics']['engagement_score']}/100")
             
-            await processing_msg.edit_text(response)
+            await processing_msg.edit_text("".join(parts))
         else:
             await processing_msg.edit_text(f"❌ {result['message']}")
 
@@ -353,17 +610,16 @@ class SuperteamBot:
         processing_msg = await update.message.reply_text("🔄 Generating A/B test variants...")
         
         try:
-            async with AsyncSessionLocal() as session:
-                advisor = ContentAdvisor(self.rag_system, session)
-                variants = await advisor.get_ab_test_variants(content, "telegram")
+            variants = await self.advisor.get_ab_test_variants(content, "telegram")
                 
-            response = "🔄 A/B Test Variants:\n\n"
-            for variant in variants:
-                response += (
-                    f"Variant {variant['variant']}:\n"
-                    f"{variant['content']}\n"
-                    f"Predicted Engagement: {variant['metrics'].get('engagement_score', 'N/A')}/100\n\n"
-                )
+            parts = ["🔄 A/B Test Variants:\n\n"]
+            parts.extend(
+                f"Variant {variant['variant']}:\n"
+                f"{variant['content']}\n"
+                f"Predicted Engagement: {variant['metrics'].get('engagement_score', 'N/A')}/100\n\n"
+                for variant in variants
+            )
+            response = "".join(parts)
                 
             keyboard = []
             for variant in variants:
@@ -386,55 +642,47 @@ class SuperteamBot:
         query = update.callback_query
         await query.answer()
 
-        if query.data == "find_members":
-            await query.message.reply_text(
-                "To find members, use the /find command followed by the skills you're looking for.\n"
-                "Example: /find rust defi"
-            )
-        elif query.data == "ask_questions":
-            await query.message.reply_text(
-                "Just type your question about Superteam Vietnam, and I'll do my best to help!"
-            )
-        elif query.data == "help":
-            await self.help_command(query, context)
-        elif query.data.startswith("more_members_"):
-            skills = query.data.replace("more_members_", "").split(',')
-            await self.show_more_members(query.message, skills)
-        elif query.data.startswith("use_variant_"):
-            variant = query.data.replace("use_variant_", "")
-            await query.message.reply_text(f"Selected variant {variant}. Use /optimize to continue optimizing this content.")
+        handler = self._cb_exact.get(query.data)
+        if handler:
+            await handler(query, context)
+            return
+
+        for prefix, handler in self._cb_prefixes:
+            if query.data.startswith(prefix):
+                await handler(query, query.data[len(prefix):])
+                break
+
+    async def _cb_find_members(self, query, context: ContextTypes.DEFAULT_TYPE):
+        """Explain how to search for members"""
+        await query.message.reply_text(
+            "To find members, use the /find command followed by the skills you're looking for.\n"
+            "Example: /find rust defi"
+        )
+
+    async def _cb_ask_questions(self, query, context: ContextTypes.DEFAULT_TYPE):
+        """Explain how to ask questions"""
+        await query.message.reply_text(
+            "Just type your question about Superteam Vietnam, and I'll do my best to help!"
+        )
+
+    async def _cb_more_members(self, query, payload: str):
+        """Show the next page of members for the comma-separated skills payload"""
+        await self.show_more_members(query.message, payload.split(','))
+
+    async def _cb_use_variant(self, query, payload: str):
+        """Acknowledge the selected A/B test variant"""
+        await query.message.reply_text(f"Selected variant {payload}. Use /optimize to continue optimizing this content.")
 
     async def show_more_members(self, message: Update.message, skills: list):
         """Show additional members for the given skills"""
-        matches = []
-        for member in self.members_db:
-            member_skills = [skill.lower() for skill in member.get('skills', [])]
-            matching_skills = set(skills) & set(member_skills)
-            
-            if matching_skills:
-                matches.append({
-                    'member': member,
-                    'matching_skills': matching_skills,
-                    'match_count': len(matching_skills)
-                })
-        
-        matches.sort(key=lambda x: x['match_count'], reverse=True)
+        matches = self._match_members(set(skills))
         
         if len(matches) <= 3:
             await message.reply_text("No additional members to show.")
             return
         
-        response = "📋 Additional matching members:\n\n"
-        for idx, match in enumerate(matches[3:6], 4):  # Start from 4th match
-            member = match['member']
-            response += (
-                f"{idx}. 👤 {member['name']}\n"
-                f"📝 Matching skills: {', '.join(match['matching_skills'])}\n"
-                f"🌟 Projects: {', '.join(member['projects'])}\n"
-                f"{'✅ Available' if member.get('availability', True) else '❌ Not Available'}\n"
-                f"🔗 Telegram: @{member.get('telegram_id', 'N/A')}\n"
-                f"🐦 Twitter: {member.get('twitter_handle', 'N/A')}\n\n"
-            )
+        # Start numbering from the 4th match
+        response = "📋 Additional matching members:\n\n" + self._format_member_matches(matches[3:6], 4)
 
         await message.reply_text(response)
 
@@ -447,38 +695,30 @@ class SuperteamBot:
             )
             return
 
-        user_id = str(update.effective_user.id)
-        if user_id not in settings.admin_ids:
+        if not self._require_admin(update):
             await update.message.reply_text("⚠️ Sorry, only admins can create tweets.")
             return
 
+        user_id = str(update.effective_user.id)
+
         content = " ".join(context.args)
         processing_msg = await update.message.reply_text("🔄 Creating tweet draft...")
 
         result = await self.twitter_manager.create_draft(user_id, content)
         
         if result['status'] == 'success':
-            response = (
-                "📝 Draft Tweet Created!\n\n"
-                f"Content: {content}\n\n"
-                "Available Commands:\n"
-                "/improve - Get AI suggestions\n"
-                "/preview - View current draft\n"
-                "/update <text> - Update draft content\n"
-                "/publish - Post the tweet"
-            )
-            
-            await processing_msg.edit_text(response)
+            await processing_msg.edit_text(TWEET_CREATED_TEMPLATE.format(content=content))
         else:
             await processing_msg.edit_text(f"❌ {result['message']}")
 
     async def preview_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /preview command"""
-        user_id = str(update.effective_user.id)
-        if user_id not in settings.admin_ids:
+        if not self._require_admin(update):
             await update.message.reply_text("⚠️ Sorry, only admins can preview tweets.")
             return
 
+        user_id = str(update.effective_user.id)
+
         result = await self.twitter_manager.preview_draft(user_id)
         
         if result['status'] == 'success':
@@ -495,28 +735,28 @@ class SuperteamBot:
 
     async def improve_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /improve command"""
-        user_id = str(update.effective_user.id)
-        if user_id not in settings.admin_ids:
+        if not self._require_admin(update):
             await update.message.reply_text("⚠️ Sorry, only admins can use this command.")
             return
 
+        user_id = str(update.effective_user.id)
+
         processing_msg = await update.message.reply_text("🔄 Analyzing tweet...")
         
         result = await self.twitter_manager.improve_draft(user_id)
 
         if result['status'] == 'success':
             suggestions = result['suggestions']
-            response = "📊 Tweet Analysis:\n\n"
+            parts = ["📊 Tweet Analysis:\n\n"]
             
             if suggestions['improvements']:
-                response += "Suggestions for Improvement:\n"
-                for improvement in suggestions['improvements']:
-                    response += f"• {improvement}\n"
+                parts.append("Suggestions for Improvement:\n")
+                parts.extend(f"• {improvement}\n" for improvement in suggestions['improvements'])
             
             if suggestions.get('rag_suggestions'):
-                response += f"\nAI Recommendations:\n{suggestions['rag_suggestions']}"
+                parts.append(f"\nAI Recommendations:\n{suggestions['rag_suggestions']}")
             
-            await processing_msg.edit_text(response)
+            await processing_msg.edit_text("".join(parts))
         else:
             await processing_msg.edit_text(f"❌ {result['message']}")
 
@@ -529,11 +769,12 @@ class SuperteamBot:
             )
             return
 
-        user_id = str(update.effective_user.id)
-        if user_id not in settings.admin_ids:
+        if not self._require_admin(update):
             await update.message.reply_text("⚠️ Sorry, only admins can update tweets.")
             return
 
+        user_id = str(update.effective_user.id)
+
         new_content = " ".join(context.args)
         processing_msg = await update.message.reply_text("🔄 Updating draft...")
         
@@ -541,26 +782,25 @@ class SuperteamBot:
         
         if result['status'] == 'success':
             suggestions = result['suggestions']
-            response = (
+            parts = [
                 "✅ Draft Updated!\n\n"
                 f"New Content: {new_content}\n\n"
                 "Suggestions for Improvement:\n"
-            )
-            
-            for improvement in suggestions['improvements']:
-                response += f"• {improvement}\n"
+            ]
+            parts.extend(f"• {improvement}\n" for improvement in suggestions['improvements'])
                 
-            await processing_msg.edit_text(response)
+            await processing_msg.edit_text("".join(parts))
         else:
             await processing_msg.edit_text(f"❌ {result['message']}")
 
     async def publish_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /publish command"""
-        user_id = str(update.effective_user.id)
-        if user_id not in settings.admin_ids:
+        if not self._require_admin(update):
             await update.message.reply_text("⚠️ Sorry, only admins can publish tweets.")
             return
 
+        user_id = str(update.effective_user.id)
+
         processing_msg = await update.message.reply_text("🔄 Publishing tweet...")
         
         result = await self.twitter_manager.publish_draft(user_id)
@@ -587,11 +827,21 @@ class SuperteamBot:
         if context.error:
             logger.error("Exception while handling an update:", exc_info=context.error)
 
+    async def _on_shutdown(self, application: Application):
+        """Release network resources and persist caches held outside of the Telegram application"""
+        await self.twitter_manager.close()
+        await asyncio.to_thread(self.rag_system.save_answer_cache)
+
     def run(self):
         """Run the bot"""
         logger.info("Starting Superteam Vietnam Bot...")
         try:
-            self.application.run_polling(allowed_updates=Update.ALL_TYPES)
+            # Long-poll so each getUpdates call returns a batch of pending updates
+            self.application.run_polling(
+                poll_interval=0.0,
+                timeout=30,
+                allowed_updates=Update.ALL_TYPES
+            )
         except Exception as e:
             logger.error(f"Error running bot: {e}")
             raise
\ No newline at end of file
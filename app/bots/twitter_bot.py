@@ -1,6 +1,15 @@
+import aiohttp
 import tweepy
-from typing import Dict, List, Optional
+from tweepy.asynchronous import AsyncClient
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+import numpy as np
+import asyncio
+import copy
+import hashlib
 import logging
+import re
+import time
 from ..core.config import settings
 from ..core.rag import EnhancedRAGSystem
 from ..core.content_advisor import ContentAdvisor
@@ -8,19 +17,68 @@ from ..core.database import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
 
+# Drafts kept in memory, how long an untouched draft lives (seconds),
+# and how many improvement suggestions each draft keeps
+MAX_DRAFTS = 10_000
+DRAFT_TTL = 86_400
+MAX_IMPROVEMENTS = 20
+
+# Cached tweet optimizations kept in memory and how long they stay valid (seconds)
+OPTIMIZATION_CACHE_SIZE = 1024
+OPTIMIZATION_CACHE_TTL = 600
+
+# Twitter handles are up to 15 word characters
+MENTION_PATTERN = re.compile(r'@(\w{1,15})')
+
+# Seconds before the followed accounts list is fetched again, and how many
+# accounts to fetch (a single page; the v2 API allows up to 1000)
+FOLLOWED_REFRESH_INTERVAL = 3600
+MAX_FOLLOWED_ACCOUNTS = 100
+
+# Tweet embeddings kept in memory
+EMBEDDING_CACHE_SIZE = 4096
+
+# Minimum cosine similarity for a different tweet to reuse a cached optimization
+SEMANTIC_MATCH_THRESHOLD = 0.97
+
+# Links, mentions, hashtags and numbers; a near-identical tweet only reuses an
+# optimization when all of these match, since the rewrite carries them over verbatim
+LITERAL_TOKEN_PATTERN = re.compile(r'https?://\S+|[@#]\w+|\d+(?:[.,:/]\d+)*')
+
+def _literal_signature(content: str) -> Tuple:
+    """Parts of a tweet a cached optimization for a different tweet must share"""
+    # The length check decides whether the 280 character warning is in the result
+    return tuple(LITERAL_TOKEN_PATTERN.findall(content)), len(content) > 280
+
+def _content_hash(content: str) -> bytes:
+    """Short digest used to detect unchanged draft content"""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest()
+
 class TwitterManager:
     def __init__(self, rag_system: EnhancedRAGSystem):
         """Initialize Twitter Manager with API client and RAG system"""
         self.rag_system = rag_system
-        self.draft_tweets: Dict[str, Dict] = {}  # Store drafts by user_id
+        self.advisor = ContentAdvisor(rag_system, AsyncSessionLocal)
+        # Store drafts by user_id, least recently written first
+        self.draft_tweets: "OrderedDict[str, Dict]" = OrderedDict()
         self.client = None
         self.followed_accounts = []
+        self._followed_usernames_lc: FrozenSet[str] = frozenset()
+        self._followed_fetched_at: Optional[float] = None
+        self._followed_lock: Optional[asyncio.Lock] = None
+        # Normalized tweet -> (stored_at, unit embedding, literal signature, optimize_tweet result),
+        # oldest first
+        self._opt_cache: "OrderedDict[str, Tuple[float, np.ndarray, Tuple, Dict]]" = OrderedDict()
+        self.cache_stats = {"hits": 0, "semantic_hits": 0, "misses": 0}
+        # SHA-256 of text -> unit embedding
+        self._embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
         self._setup_twitter_client()
 
     def _setup_twitter_client(self):
         """Initialize Twitter API client"""
         try:
-            self.client = tweepy.Client(
+            # Async client so API round-trips don't block the event loop
+            self.client = AsyncClient(
                 consumer_key=settings.TWITTER_API_KEY,
                 consumer_secret=settings.TWITTER_API_SECRET,
                 access_token=settings.TWITTER_ACCESS_TOKEN,
@@ -31,27 +89,172 @@ class TwitterManager:
             logger.error(f"Error initializing Twitter client: {e}")
             self.client = None
 
+    def _evict_drafts(self):
+        """Drop drafts that have expired or exceed the draft limit"""
+        now = time.monotonic()
+        while self.draft_tweets:
+            user_id, draft = next(iter(self.draft_tweets.items()))
+            if len(self.draft_tweets) <= MAX_DRAFTS and now - draft['updated_at'] < DRAFT_TTL:
+                break
+            del self.draft_tweets[user_id]
+
+    def _store_draft(self, user_id: str, draft: Dict):
+        """Save a draft, deduplicating and capping its improvement suggestions"""
+        improvements = draft['suggestions'].get('improvements', [])
+        draft['suggestions']['improvements'] = list(dict.fromkeys(improvements))[-MAX_IMPROVEMENTS:]
+        draft['updated_at'] = time.monotonic()
+        self.draft_tweets[user_id] = draft
+        self.draft_tweets.move_to_end(user_id)
+        self._evict_drafts()
+
+    def set_followed_accounts(self, accounts: List[Dict]):
+        """Replace the followed accounts used to validate @mentions"""
+        self.followed_accounts = accounts
+        self._followed_usernames_lc = frozenset(acc['username'].lower() for acc in accounts)
+
+    async def _get_followed_usernames(self) -> FrozenSet[str]:
+        """Return lowercased followed usernames, refreshing from Twitter when stale"""
+        if (
+            self.client is None
+            or (self._followed_fetched_at is not None
+                and time.monotonic() - self._followed_fetched_at < FOLLOWED_REFRESH_INTERVAL)
+        ):
+            return self._followed_usernames_lc
+
+        # Created lazily so it binds to the running event loop
+        if self._followed_lock is None:
+            self._followed_lock = asyncio.Lock()
+
+        async with self._followed_lock:
+            # Another caller may have refreshed while we waited
+            if (self._followed_fetched_at is not None
+                    and time.monotonic() - self._followed_fetched_at < FOLLOWED_REFRESH_INTERVAL):
+                return self._followed_usernames_lc
+            try:
+                self._ensure_session()
+                me = await self.client.get_me(user_auth=True)
+                response = await self.client.get_users_following(
+                    id=me.data.id, max_results=MAX_FOLLOWED_ACCOUNTS, user_auth=True
+                )
+                self.set_followed_accounts([
+                    {'id': user.id, 'username': user.username}
+                    for user in (response.data or [])
+                ])
+                logger.info(f"Loaded {len(self.followed_accounts)} followed accounts")
+            except Exception as e:
+                logger.error(f"Error fetching followed accounts: {e}")
+            # Also on failure, so a broken API isn't retried on every draft
+            self._followed_fetched_at = time.monotonic()
+
+        return self._followed_usernames_lc
+
+    def _ensure_session(self):
+        """Give the Twitter client a session with tuned connection limits and timeout"""
+        # AsyncClient would lazily create and then reuse its own default session;
+        # this one caps connections per host, caches DNS and shortens the timeout.
+        # Created on first use so it binds to the running event loop
+        if self.client.session is None or self.client.session.closed:
+            self.client.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=10, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+
+    async def close(self):
+        """Close the Twitter client's HTTP session"""
+        session = getattr(self.client, "session", None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Fraction of optimize_tweet calls answered from the cache"""
+        total = sum(self.cache_stats.values())
+        if not total:
+            return 0.0
+        return (self.cache_stats["hits"] + self.cache_stats["semantic_hits"]) / total
+
+    def _evict_expired(self, now: float):
+        """Drop cached optimizations older than the TTL"""
+        while self._opt_cache:
+            key, (stored_at, _, _, _) = next(iter(self._opt_cache.items()))
+            if now - stored_at < OPTIMIZATION_CACHE_TTL:
+                break
+            del self._opt_cache[key]
+
+    async def _embed(self, text: str) -> np.ndarray:
+        """Embed a tweet as a unit vector, reusing the vector for text seen before"""
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        vector = self._embedding_cache.get(key)
+        if vector is not None:
+            self._embedding_cache.move_to_end(key)
+            return vector
+
+        vector = np.asarray(
+            await asyncio.to_thread(self.rag_system.embeddings.embed_query, text),
+            dtype=np.float32
+        )
+        vector /= np.linalg.norm(vector) or 1.0
+        self._embedding_cache[key] = vector
+        if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+        return vector
+
+    def _semantic_lookup(self, vector: np.ndarray, signature: Tuple) -> Optional[Dict]:
+        """Find a cached optimization for a near-identical tweet with the same links, mentions and numbers"""
+        entries = [entry for entry in self._opt_cache.values() if entry[2] == signature]
+        if not entries:
+            return None
+        similarities = np.stack([vec for _, vec, _, _ in entries]) @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] >= SEMANTIC_MATCH_THRESHOLD:
+            return entries[best][3]
+        return None
+
     async def optimize_tweet(self, content: str) -> Dict:
-        """Optimize a tweet using ContentAdvisor"""
+        """Optimize a tweet using ContentAdvisor, reusing results for identical or near-identical tweets"""
         try:
-            async with AsyncSessionLocal() as session:
-                advisor = ContentAdvisor(self.rag_system, session)
-                result = await advisor.optimize_content(content, "twitter")
-                
-                if result["status"] == "success":
-                    suggestions = {
-                        "improvements": result["suggestions"],
-                        "hashtags": result["tags"]["hashtags"],
-                        "engagement_score": result["metrics"]["engagement_score"],
-                        "best_time": result["metrics"]["best_time"],
-                        "recommended_hashtags": result["tags"]["hashtags"]
-                    }
-                    return {
-                        "status": "success",
-                        "content": result["optimized_content"],
-                        "suggestions": suggestions
-                    }
-                return result
+            key = " ".join(content.split())
+            now = time.monotonic()
+            self._evict_expired(now)
+
+            cached = self._opt_cache.get(key)
+            if cached:
+                self.cache_stats["hits"] += 1
+                return copy.deepcopy(cached[3])
+
+            vector = None
+            signature = _literal_signature(key)
+            try:
+                vector = await self._embed(key)
+                similar = self._semantic_lookup(vector, signature)
+                if similar:
+                    self.cache_stats["semantic_hits"] += 1
+                    return copy.deepcopy(similar)
+            except Exception as e:
+                logger.warning(f"Semantic cache lookup failed: {e}")
+
+            self.cache_stats["misses"] += 1
+            result = await self.advisor.optimize_content(content, "twitter")
+            
+            if result["status"] == "success":
+                suggestions = {
+                    "improvements": result["suggestions"],
+                    "hashtags": result["tags"]["hashtags"],
+                    "engagement_score": result["metrics"]["engagement_score"],
+                    "best_time": result["metrics"]["best_time"],
+                    "recommended_hashtags": result["tags"]["hashtags"]
+                }
+                optimized = {
+                    "status": "success",
+                    "content": result["optimized_content"],
+                    "suggestions": suggestions
+                }
+                if vector is not None:
+                    self._opt_cache[key] = (now, vector, signature, copy.deepcopy(optimized))
+                    if len(self._opt_cache) > OPTIMIZATION_CACHE_SIZE:
+                        self._opt_cache.popitem(last=False)
+                return optimized
+            return result
         except Exception as e:
             logger.error(f"Error optimizing tweet: {e}")
             return {
@@ -59,15 +262,28 @@ class TwitterManager:
                 "message": "Failed to optimize tweet"
             }
 
-    async def create_draft(self, user_id: str, content: str) -> Dict:
+    async def create_draft(self, user_id: str, content: str, version: int = 1) -> Dict:
         """Create a new tweet draft without initial optimization"""
         try:
             logger.info(f"Creating draft for user {user_id}")
             
-            self.draft_tweets[user_id] = {
+            # Nothing to redo if the draft already has this exact content
+            content_hash = _content_hash(content)
+            self._evict_drafts()
+            existing = self.draft_tweets.get(user_id)
+            if existing and existing.get('content_hash') == content_hash:
+                return {
+                    'status': 'success',
+                    'message': 'Draft unchanged',
+                    'content': content,
+                    'suggestions': existing['suggestions']
+                }
+            
+            draft = {
                 'content': content,
+                'content_hash': content_hash,
                 'original_content': content,
-                'version': 1,
+                'version': version,
                 'suggestions': {
                     'improvements': [],
                     'recommended_hashtags': ['#SuperteamVN', '#Web3Vietnam', '#BuildWeb3']
@@ -80,23 +296,26 @@ class TwitterManager:
 
             # Basic validation
             if len(content) > 280:
-                self.draft_tweets[user_id]['suggestions']['improvements'].append(
+                draft['suggestions']['improvements'].append(
                     "⚠️ Tweet exceeds 280 character limit"
                 )
             
             # Check mentions
-            mentioned_users = [word[1:] for word in content.split() if word.startswith('@')]
+            mentioned_users = MENTION_PATTERN.findall(content) if '@' in content else []
+            followed = await self._get_followed_usernames() if mentioned_users else frozenset()
             for username in mentioned_users:
-                if not any(acc['username'].lower() == username.lower() for acc in self.followed_accounts):
-                    self.draft_tweets[user_id]['suggestions']['improvements'].append(
+                if username.lower() not in followed:
+                    draft['suggestions']['improvements'].append(
                         f"@{username} is not in followed accounts"
                     )
 
+            self._store_draft(user_id, draft)
+
             return {
                 'status': 'success',
                 'message': 'Draft created successfully',
                 'content': content,
-                'suggestions': self.draft_tweets[user_id]['suggestions']
+                'suggestions': draft['suggestions']
             }
 
         except Exception as e:
@@ -111,6 +330,7 @@ class TwitterManager:
         try:
             logger.info(f"Getting preview for user {user_id}")
             
+            self._evict_drafts()
             if user_id not in self.draft_tweets:
                 return {
                     'status': 'error',
@@ -145,6 +365,7 @@ class TwitterManager:
     async def improve_draft(self, user_id: str) -> Dict:
         """Get AI-powered improvements for current draft"""
         try:
+            self._evict_drafts()
             if user_id not in self.draft_tweets:
                 return {
                     'status': 'error',
@@ -168,7 +389,7 @@ class TwitterManager:
                     'best_time': new_suggestions.get('best_time', 'N/A')
                 }
                 
-                self.draft_tweets[user_id] = draft
+                self._store_draft(user_id, draft)
 
                 return {
                     'status': 'success',
@@ -187,18 +408,18 @@ class TwitterManager:
     async def update_draft(self, user_id: str, new_content: str) -> Dict:
         """Update existing draft content"""
         try:
+            self._evict_drafts()
             if user_id not in self.draft_tweets:
                 return {
                     'status': 'error',
                     'message': 'No draft found'
                 }
 
-            # Create new draft with optimization
-            result = await self.create_draft(user_id, new_content)
+            # Replace the draft, continuing from the previous version
+            prev_version = self.draft_tweets[user_id]['version']
+            result = await self.create_draft(user_id, new_content, version=prev_version + 1)
             
             if result['status'] == 'success':
-                # Increment version from previous draft
-                self.draft_tweets[user_id]['version'] = self.draft_tweets[user_id]['version'] + 1
                 return result
             return {
                 'status': 'error',
@@ -214,14 +435,12 @@ class TwitterManager:
     async def generate_ab_variants(self, content: str) -> Dict:
         """Generate A/B test variants for a tweet"""
         try:
-            async with AsyncSessionLocal() as session:
-                advisor = ContentAdvisor(self.rag_system, session)
-                variants = await advisor.get_ab_test_variants(content, "twitter", num_variants=3)
-                
-                return {
-                    'status': 'success',
-                    'variants': variants
-                }
+            variants = await self.advisor.get_ab_test_variants(content, "twitter", num_variants=3)
+            
+            return {
+                'status': 'success',
+                'variants': variants
+            }
         except Exception as e:
             logger.error(f"Error generating A/B variants: {e}")
             return {
@@ -232,6 +451,7 @@ class TwitterManager:
     async def publish_draft(self, user_id: str) -> Dict:
         """Publish the current draft tweet"""
         try:
+            self._evict_drafts()
             if user_id not in self.draft_tweets:
                 return {
                     'status': 'error',
@@ -244,7 +464,8 @@ class TwitterManager:
             if self.client:
                 try:
                     # Use v2 create_tweet method
-                    tweet = self.client.create_tweet(text=content)
+                    self._ensure_session()
+                    tweet = await self.client.create_tweet(text=content)
                     
                     # Clear the draft
                     del self.draft_tweets[user_id]
@@ -1,14 +1,32 @@
 from pathlib import Path
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import FrozenSet, Optional, List
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
-# Enhanced logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+def _setup_logging():
+    """Hand log records to a background thread so logging never blocks request handling"""
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+    listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener.start()
+    atexit.register(listener.stop)
+
+_setup_logging()
 logger = logging.getLogger(__name__)
 
 class Settings(BaseSettings):
@@ -20,12 +38,16 @@ class Settings(BaseSettings):
     # LLM Configuration
     MODEL_PATH: str = str(MODEL_DIR / "llama-2-7b-chat.Q4_K_M.gguf")
     CONTEXT_LENGTH: int = 4096
-    GPU_LAYERS: int = 0
+    GPU_LAYERS: int = -1  # -1 offloads every layer; ignored without a CUDA/Metal build
+    N_BATCH: int = 512
     THREADS: int = 4
     MAX_TOKENS: int = 2048
+    DEBUG_STREAMING: bool = False
+    EMBEDDING_INT8: bool = True
     
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./data/superteam.db"
+    SQL_ECHO: bool = False
     
     # Vector Store
     VECTOR_STORE_PATH: str = str(DATA_DIR / "vector_store")
@@ -33,6 +55,8 @@ class Settings(BaseSettings):
     # Telegram Configuration
     TELEGRAM_BOT_TOKEN: str
     TELEGRAM_ADMIN_IDS: str
+    TELEGRAM_CONCURRENT_UPDATES: int = 64
+    TELEGRAM_CONNECTION_POOL_SIZE: int = 256
     
     # Optional Twitter Configuration
     TWITTER_API_KEY: Optional[str] = None
@@ -43,22 +67,33 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str
     ADMIN_PASSWORD: str
+    MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024
+
+    # Admin panel server
+    ADMIN_HOST: str = "127.0.0.1"
+    ADMIN_PORT: int = 8000
+
+    # Parsed TELEGRAM_ADMIN_IDS for O(1) membership checks
+    _admin_id_set: FrozenSet[int] = PrivateAttr(default_factory=frozenset)
 
     def __init__(self, **kwargs):
         """Initialize settings with validation"""
         super().__init__(**kwargs)
-        # Log initial values
         logger.info(f"Initializing settings from: {os.path.abspath('.env')}")
-        logger.info(f"Initial TELEGRAM_ADMIN_IDS value: {self.TELEGRAM_ADMIN_IDS}")
+        self._admin_id_set = frozenset(int(x) for x in self._parse_admin_ids())
+
+    def is_admin(self, user_id: int) -> bool:
+        """Check whether a Telegram user ID belongs to a configured admin"""
+        return user_id in self._admin_id_set
 
     @property
-    def admin_ids(self) -> List[str]:
-        """Get list of admin IDs with enhanced validation and logging"""
-        try:
-            # Log raw value
-            logger.info(f"Processing TELEGRAM_ADMIN_IDS: {self.TELEGRAM_ADMIN_IDS}")
-            print(f"Debug - Raw admin IDs value: {self.TELEGRAM_ADMIN_IDS}")  # Direct debug print
+    def admin_ids(self) -> FrozenSet[int]:
+        """Get admin IDs as integers, parsed once at startup"""
+        return self._admin_id_set
 
+    def _parse_admin_ids(self) -> List[str]:
+        """Parse and validate TELEGRAM_ADMIN_IDS"""
+        try:
             if not self.TELEGRAM_ADMIN_IDS:
                 logger.warning("No admin IDs configured")
                 return []
@@ -70,14 +105,13 @@ class Settings(BaseSettings):
                 # Validate ID format
                 if cleaned_id.isdigit():
                     admin_list.append(cleaned_id)
-                    logger.info(f"Added valid admin ID: {cleaned_id}")
                 else:
                     logger.warning(f"Skipped invalid admin ID: {cleaned_id}")
 
             if not admin_list:
                 logger.warning("No valid admin IDs found after validation")
             else:
-                logger.info(f"Final validated admin IDs: {admin_list}")
+                logger.debug(f"Parsed {len(admin_list)} admin IDs")
 
             return admin_list
 
@@ -89,14 +123,14 @@ class Settings(BaseSettings):
         """Validate and create necessary directories"""
         try:
             # Create required directories if they don't exist
-            self.DATA_DIR.mkdir(parents=True, exist_ok=True)
-            self.MODEL_DIR.mkdir(parents=True, exist_ok=True)
-            Path(self.VECTOR_STORE_PATH).mkdir(parents=True, exist_ok=True)
+            for path in (self.DATA_DIR, self.MODEL_DIR, Path(self.VECTOR_STORE_PATH)):
+                if not path.is_dir():
+                    path.mkdir(parents=True, exist_ok=True)
             
-            # Log directory creation
-            logger.info(f"Data directory: {self.DATA_DIR}")
-            logger.info(f"Model directory: {self.MODEL_DIR}")
-            logger.info(f"Vector store directory: {self.VECTOR_STORE_PATH}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Data directory: {self.DATA_DIR}")
+                logger.debug(f"Model directory: {self.MODEL_DIR}")
+                logger.debug(f"Vector store directory: {self.VECTOR_STORE_PATH}")
             
         except Exception as e:
             logger.error(f"Error creating directories: {e}")
@@ -110,19 +144,10 @@ class Settings(BaseSettings):
 
 # Initialize settings with enhanced error handling
 try:
-    # Debug: Print current environment
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Looking for .env at: {os.path.abspath('.env')}")
-    print(f"Current TELEGRAM_ADMIN_IDS env var: {os.getenv('TELEGRAM_ADMIN_IDS')}")
-    
-    # Initialize settings
+    # Initialize settings; directories are created by validate_paths() at app startup
     settings = Settings(_env_file='.env')
     
-    # Validate directories
-    settings.validate_paths()
-    
-    # Debug: Print final admin IDs
-    print(f"Initialized admin IDs: {settings.admin_ids}")
+    logger.debug(f"Initialized {len(settings.admin_ids)} admin IDs")
     
 except Exception as e:
     logger.error(f"Failed to initialize settings: {e}", exc_info=True)
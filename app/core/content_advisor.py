@@ -1,12 +1,13 @@
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
-from datetime import datetime
+from collections import OrderedDict, defaultdict
 from langchain.prompts import PromptTemplate
 from .rag import EnhancedRAGSystem
 from .models import Tweet
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-import json
+import orjson
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -38,16 +39,36 @@ Response should be in JSON format with these keys:
 - keywords
 """
 
+# Tracked content entries kept per platform
+PERFORMANCE_CACHE_SIZE = 100
+
+# Seconds to reuse recent tweet performance before querying the database again
+PERFORMANCE_DATA_TTL = 60
+
+# Built once; SQLAlchemy's compiled cache then reuses its SQL on every execution.
+# Only the columns used are selected, so rows aren't hydrated into ORM objects
+RECENT_TWEETS_QUERY = (
+    select(Tweet.content, Tweet.meta_info, Tweet.created_at)
+    .order_by(Tweet.created_at.desc())
+    .limit(10)
+)
+
 class ContentAdvisor:
-    def __init__(self, rag_system: EnhancedRAGSystem, db_session: AsyncSession):
-        """Initialize Content Advisor with RAG system and database session"""
+    def __init__(
+        self,
+        rag_system: EnhancedRAGSystem,
+        session_factory: Callable[[], AsyncSession]
+    ):
+        """Initialize Content Advisor with RAG system and a database session factory"""
         self.rag = rag_system
-        self.db = db_session
+        self._session_factory = session_factory
         self.prompt = PromptTemplate(
             template=CONTENT_OPTIMIZATION_PROMPT,
             input_variables=["platform", "content", "performance_data"]
         )
-        self.performance_cache = {}
+        # Platform -> content_id -> tracked metrics, oldest first
+        self.performance_cache: "defaultdict[str, OrderedDict[str, Dict]]" = defaultdict(OrderedDict)
+        self._recent_tweets: Optional[Tuple[float, Dict]] = None
 
     async def optimize_content(
         self,
@@ -60,57 +81,14 @@ class ContentAdvisor:
         Returns optimized content and suggestions
         """
         try:
-            # Get performance data for similar content
-            performance_data = await self._get_performance_data(content, platform)
-            
-            # Prepare optimization prompt
-            optimization_input = {
-                "platform": platform,
-                "content": content,
-                "performance_data": json.dumps(performance_data)
-            }
+            prompt, platform_suggestions = await self._prepare_optimization(content, platform)
             
             # Get optimization suggestions from RAG
-            result = await self.rag.query(
-                self.prompt.format(**optimization_input),
-                confidence_threshold=0.8
-            )
+            # Optimization prompts differ only in a small slice of template text, so
+            # they must not share answers through the semantic cache
+            result = await self.rag.query(prompt, confidence_threshold=0.8, use_cache=False)
             
-            # Parse RAG response
-            try:
-                suggestions = json.loads(result["answer"])
-            except json.JSONDecodeError:
-                logger.error("Failed to parse RAG response as JSON")
-                suggestions = {
-                    "improved_content": content,
-                    "suggestions": ["Error processing suggestions"],
-                    "engagement_score": 0,
-                    "best_time_to_post": "N/A",
-                    "hashtags": [],
-                    "keywords": []
-                }
-            
-            # Add platform-specific optimizations
-            if platform == "twitter":
-                suggestions.update(await self._optimize_for_twitter(content))
-            elif platform == "telegram":
-                suggestions.update(await self._optimize_for_telegram(content))
-            
-            return {
-                "status": "success",
-                "original_content": content,
-                "optimized_content": suggestions["improved_content"],
-                "suggestions": suggestions["suggestions"],
-                "metrics": {
-                    "engagement_score": suggestions["engagement_score"],
-                    "best_time": suggestions["best_time_to_post"],
-                    "confidence": result["confidence"]
-                },
-                "tags": {
-                    "hashtags": suggestions["hashtags"],
-                    "keywords": suggestions["keywords"]
-                }
-            }
+            return self._build_optimization_result(content, result, platform_suggestions)
             
         except Exception as e:
             logger.error(f"Error optimizing content: {e}")
@@ -120,6 +98,64 @@ class ContentAdvisor:
                 "error": str(e)
             }
 
+    async def _prepare_optimization(self, content: str, platform: str) -> Tuple[str, Dict]:
+        """Build the optimization prompt and platform-specific suggestions for content"""
+        if platform == "twitter":
+            platform_suggestions = await self._optimize_for_twitter(content)
+        elif platform == "telegram":
+            platform_suggestions = await self._optimize_for_telegram(content)
+        else:
+            platform_suggestions = {}
+        performance_data = await self._get_performance_data(content, platform)
+        
+        # Prepare optimization prompt
+        optimization_input = {
+            "platform": platform,
+            "content": content,
+            "performance_data": orjson.dumps(performance_data).decode()
+        }
+        return self.prompt.format(**optimization_input), platform_suggestions
+
+    def _build_optimization_result(
+        self,
+        content: str,
+        result: Dict,
+        platform_suggestions: Dict
+    ) -> Dict:
+        """Merge a RAG answer and platform suggestions into an optimize_content result"""
+        # Parse RAG response
+        try:
+            suggestions = orjson.loads(result["answer"])
+        except orjson.JSONDecodeError:
+            logger.error("Failed to parse RAG response as JSON")
+            suggestions = {
+                "improved_content": content,
+                "suggestions": ["Error processing suggestions"],
+                "engagement_score": 0,
+                "best_time_to_post": "N/A",
+                "hashtags": [],
+                "keywords": []
+            }
+        
+        # Add platform-specific optimizations
+        suggestions.update(platform_suggestions)
+        
+        return {
+            "status": "success",
+            "original_content": content,
+            "optimized_content": suggestions["improved_content"],
+            "suggestions": suggestions["suggestions"],
+            "metrics": {
+                "engagement_score": suggestions["engagement_score"],
+                "best_time": suggestions["best_time_to_post"],
+                "confidence": result["confidence"]
+            },
+            "tags": {
+                "hashtags": suggestions["hashtags"],
+                "keywords": suggestions["keywords"]
+            }
+        }
+
     async def _optimize_for_twitter(self, content: str) -> Dict:
         """Twitter-specific optimizations"""
         suggestions = {
@@ -167,21 +203,27 @@ class ContentAdvisor:
         """Get historical performance data for similar content"""
         try:
             if platform == "twitter":
+                # Reuse recent results so back-to-back optimizations skip the database
+                if self._recent_tweets and time.monotonic() - self._recent_tweets[0] < PERFORMANCE_DATA_TTL:
+                    return self._recent_tweets[1]
+
                 # Get recent tweet performance
-                stmt = select(Tweet).order_by(Tweet.created_at.desc()).limit(10)
-                result = await self.db.execute(stmt)
-                tweets = result.scalars().all()
+                async with self._session_factory() as session:
+                    result = await session.execute(RECENT_TWEETS_QUERY)
+                    tweets = result.mappings().all()
                 
-                return {
+                data = {
                     "recent_performance": [
                         {
-                            "content": tweet.content,
-                            "engagement": tweet.metadata.get("engagement", 0),
-                            "posted_at": tweet.created_at.isoformat()
+                            "content": tweet["content"],
+                            "engagement": (tweet["meta_info"] or {}).get("engagement", 0),
+                            "posted_at": tweet["created_at"].isoformat()
                         }
                         for tweet in tweets
                     ]
                 }
+                self._recent_tweets = (time.monotonic(), data)
+                return data
             else:
                 # Return cached or default performance data
                 return self.performance_cache.get(platform, {
@@ -200,22 +242,17 @@ class ContentAdvisor:
     ) -> None:
         """Track content performance for future optimization"""
         try:
-            # Store performance data
-            self.performance_cache[platform] = self.performance_cache.get(platform, {})
-            self.performance_cache[platform][content_id] = {
+            # Store performance data as the most recent entry
+            bucket = self.performance_cache[platform]
+            bucket[content_id] = {
                 "metrics": metrics,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": time.time_ns()
             }
+            bucket.move_to_end(content_id)
             
-            # Trim cache if needed
-            if len(self.performance_cache[platform]) > 100:
-                # Keep only most recent 100 entries
-                sorted_items = sorted(
-                    self.performance_cache[platform].items(),
-                    key=lambda x: x[1]["timestamp"],
-                    reverse=True
-                )
-                self.performance_cache[platform] = dict(sorted_items[:100])
+            # Keep only the most recent entries
+            while len(bucket) > PERFORMANCE_CACHE_SIZE:
+                bucket.popitem(last=False)
                 
         except Exception as e:
             logger.error(f"Error tracking performance: {e}")
@@ -236,13 +273,18 @@ class ContentAdvisor:
                 "metrics": base_optimization["metrics"]
             })
             
-            # Generate additional variants
+            base_content = base_optimization["optimized_content"]
+            prompt, platform_suggestions = await self._prepare_optimization(base_content, platform)
+            # One query per variant, in order: the prompts usually retrieve the same
+            # context and differ only in the last line, so llama.cpp reuses the
+            # evaluated prefix instead of prefilling it again
             for i in range(num_variants - 1):
-                variant = await self.optimize_content(
-                    base_optimization["optimized_content"],
-                    platform,
-                    {"variation_level": i + 1}
+                result = await self.rag.query(
+                    f"{prompt}\nVariation {i + 1}: make this version distinct from the other variations.",
+                    confidence_threshold=0.8,
+                    use_cache=False
                 )
+                variant = self._build_optimization_result(base_content, result, platform_suggestions)
                 variants.append({
                     "variant": chr(66 + i),  # B, C, D, etc.
                     "content": variant["optimized_content"],
@@ -272,7 +314,7 @@ class ContentAdvisor:
             )
             
             # Get improvement suggestions
-            result = await self.rag.query(iteration_prompt)
+            result = await self.rag.query(iteration_prompt, use_cache=False)
             
             # Optimize the improved content
             optimized = await self.optimize_content(
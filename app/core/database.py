@@ -1,5 +1,6 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
 
 # Convert SQLite URL to async format if not already in async format
@@ -7,19 +8,29 @@ db_url = settings.DATABASE_URL
 if not db_url.startswith('sqlite+aiosqlite:///'):
     db_url = db_url.replace('sqlite:///', 'sqlite+aiosqlite:///')
 
-# Create async engine
+# Create async engine with a shared connection pool
 engine = create_async_engine(
     db_url,
-    echo=True,
+    echo=settings.SQL_ECHO,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=20,
+    max_overflow=10,
     connect_args={"check_same_thread": False}
 )
 
+if db_url.startswith('sqlite'):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers don't block the writer, and fsync only at checkpoints"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 # Create async session factory
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
+AsyncSessionLocal = async_sessionmaker(
+    engine,
     expire_on_commit=False,
-    autocommit=False,
     autoflush=False
 )
 
@@ -29,4 +40,4 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
@@ -34,5 +34,5 @@ class Tweet(Base):
     content = Column(String)
     status = Column(String)  # draft, approved, published
     meta_info = Column(JSON)  # Changed from metadata to meta_info
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     published_at = Column(DateTime, nullable=True)
\ No newline at end of file
@@ -1,14 +1,21 @@
 from langchain_community.llms import LlamaCpp
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.vectorstores import Chroma
 from langchain.embeddings import HuggingFaceEmbeddings
+from langchain.schema import Document
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
 import numpy as np
+import asyncio
+import hashlib
+import os
+import uuid
+import torch
+import torch.nn.functional as F
 from .config import settings
 import logging
 
@@ -29,19 +36,172 @@ Instructions:
 
 Answer: Let me help you with that."""
 
+NO_CONTEXT_ANSWER = "I don't have enough information to answer this question accurately."
+LOW_CONFIDENCE_ANSWER = "While I have some information, I'm not confident enough to provide an accurate answer to this question."
+ERROR_ANSWER = "Sorry, I encountered an error while processing your question. Please try again later."
+
+# HNSW index settings; embeddings are unit length, so cosine distance is cheap and exact
+COLLECTION_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64
+}
+
+# Sentence embedding model, and how documents are split into chunks for it
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+# Number of chunks retrieved per question
+RETRIEVAL_K = 3
+
+# Most questions coalesced into a single embedding + vector store call
+QUERY_BATCH_SIZE = 16
+
+# Seconds the batcher waits for more questions before dispatching a batch
+QUERY_BATCH_WAIT = 0.075
+
+# Generated answers kept for reuse, and the minimum cosine similarity for a
+# different question to reuse one
+ANSWER_CACHE_SIZE = 1000
+ANSWER_MATCH_THRESHOLD = 0.97
+ANSWER_CACHE_FILE = "answer_cache.npz"
+
+# Digest of the knowledge base last embedded into the vector store
+KB_HASH_FILE = "kb_hash.txt"
+
+# Knowledge base chunks embedded and added per vector store call
+KB_BLOCK_SIZE = 512
+
+# Recency weights for confidence scoring, precomputed for every possible result count
+CONFIDENCE_WEIGHTS = {
+    k: np.exp(np.linspace(-1, 0, k)).astype(np.float32)
+    for k in range(1, RETRIEVAL_K + 1)
+}
+
+SearchResult = Tuple[np.ndarray, List[Tuple[Document, float]]]
+
+class _FastEmbeddings(HuggingFaceEmbeddings):
+    """HuggingFaceEmbeddings that tokenizes and runs the transformer directly under inference_mode"""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts as mean-pooled, L2-normalized vectors"""
+        texts = [text.replace("\n", " ") for text in texts]
+        tokenizer = self.client.tokenizer
+        model = self.client[0].auto_model
+        batch_size = self.encode_kwargs.get("batch_size", 32)
+        vectors = []
+        with torch.inference_mode():
+            for start in range(0, len(texts), batch_size):
+                encoded = tokenizer(
+                    texts[start:start + batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.client.max_seq_length,
+                    return_tensors="pt"
+                )
+                hidden = model(**encoded).last_hidden_state
+                mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                vectors.append(F.normalize(pooled, dim=1))
+        return torch.cat(vectors).tolist() if vectors else []
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query"""
+        return self.embed_documents([text])[0]
+
+class _QueryBatcher:
+    """Coalesces concurrent retrievals into one embedding and one vector store call"""
+
+    def __init__(
+        self,
+        search_batch: Callable[[List[str]], List[SearchResult]],
+        max_batch: int = QUERY_BATCH_SIZE,
+        max_wait: float = QUERY_BATCH_WAIT
+    ):
+        self._search_batch = search_batch
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def search(self, question: str) -> SearchResult:
+        """Queue a question and wait for its embedding and retrieved chunks"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._dispatch_loop())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((question, future))
+        return await future
+
+    async def _dispatch_loop(self):
+        """Drain up to max_batch questions or until max_wait elapses, then search them together"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await asyncio.to_thread(self._search_batch, [q for q, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
 class EnhancedRAGSystem:
     def __init__(self):
         """Initialize the enhanced RAG system with vector storage and improved chunking"""
+        self._init_sync()
+
+    @classmethod
+    async def create(cls) -> "EnhancedRAGSystem":
+        """Build the RAG system in a worker thread so model loading doesn't block the event loop"""
+        self = cls.__new__(cls)
+        await asyncio.to_thread(self._init_sync)
+        return self
+
+    def _init_sync(self):
+        """Load models and the knowledge base"""
         try:
             logger.info("Initializing Enhanced RAG System...")
-            self._setup_embeddings()
+            # Load the LLM weights while the embedding model loads on this thread
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-load") as pool:
+                llm_loaded = pool.submit(self._setup_llm)
+                self._setup_embeddings()
+                llm_loaded.result()
             self._setup_vector_store()
             self._setup_text_splitter()
-            self._setup_llm()
             self._setup_prompt()
+            self._batcher = _QueryBatcher(self._search_batch)
+            # llama.cpp contexts are not thread-safe, so generations run one at a time.
+            # Created lazily so it binds to the running event loop
+            self._llm_lock: Optional[asyncio.Lock] = None
+            # Question -> (unit embedding, answer, confidence), least recently used first
+            self._answers: "OrderedDict[str, Tuple[np.ndarray, str, float]]" = OrderedDict()
+            # Stacked embeddings for one matrix-vector lookup, rebuilt after inserts
+            self._answer_matrix: Optional[np.ndarray] = None
+            self._answer_keys: List[str] = []
             
             # Load initial knowledge base
             self._load_knowledge_base()
+            # Vector store size the cached answers were generated against
+            self._answers_collection_size = self.vector_store._collection.count()
+            self._load_answer_cache()
             
             logger.info("Enhanced RAG System initialized successfully")
         except Exception as e:
@@ -52,10 +212,17 @@ class EnhancedRAGSystem:
         """Initialize the embedding model"""
         try:
             logger.info("Setting up embeddings...")
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cpu'}
+            self.embeddings = _FastEmbeddings(
+                model_name=EMBEDDING_MODEL_NAME,
+                model_kwargs={'device': 'cpu'},
+                encode_kwargs={'batch_size': 64, 'normalize_embeddings': True}
             )
+            self.embeddings.client.eval()
+            if settings.EMBEDDING_INT8:
+                # int8 Linear layers roughly halve memory traffic and use VNNI kernels on CPU
+                torch.quantization.quantize_dynamic(
+                    self.embeddings.client, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+                )
         except Exception as e:
             logger.error(f"Error setting up embeddings: {e}")
             raise
@@ -69,7 +236,8 @@ class EnhancedRAGSystem:
             
             self.vector_store = Chroma(
                 persist_directory=str(vector_store_path),
-                embedding_function=self.embeddings
+                embedding_function=self.embeddings,
+                collection_metadata=COLLECTION_METADATA
             )
         except Exception as e:
             logger.error(f"Error setting up vector store: {e}")
@@ -78,10 +246,10 @@ class EnhancedRAGSystem:
     def _setup_text_splitter(self):
         """Initialize the text splitter for document chunking"""
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
             length_function=len,
-            separators=["\n\n", "\n", ". ", " ", ""]
+            separators=CHUNK_SEPARATORS
         )
 
     def _setup_llm(self):
@@ -94,7 +262,16 @@ class EnhancedRAGSystem:
                 logger.error(f"Model file not found at: {model_path.absolute()}")
                 raise FileNotFoundError(f"Model not found at {model_path}")
             
-            callback_manager = CallbackManager([StreamingStdOutCallbackHandler()])
+            # Echoing every token to stdout is only useful when debugging generation
+            callback_manager = (
+                CallbackManager([StreamingStdOutCallbackHandler()])
+                if settings.DEBUG_STREAMING else None
+            )
+
+            gpu_layers = settings.GPU_LAYERS
+            if gpu_layers and not (torch.cuda.is_available() or torch.backends.mps.is_available()):
+                logger.info("No GPU available, running the LLM on CPU")
+                gpu_layers = 0
             
             self.llm = LlamaCpp(
                 model_path=str(model_path),
@@ -103,110 +280,202 @@ class EnhancedRAGSystem:
                 n_ctx=settings.CONTEXT_LENGTH,
                 n_threads=settings.THREADS,
                 callback_manager=callback_manager,
-                n_gpu_layers=settings.GPU_LAYERS,
+                n_gpu_layers=gpu_layers,
+                n_batch=settings.N_BATCH,
                 use_mlock=True,
                 use_mmap=True,
                 top_p=0.1,
-                repeat_penalty=1.2
+                repeat_penalty=1.2,
+                # Keep the KV cache on the GPU alongside offloaded layers
+                model_kwargs={"offload_kqv": True}
             )
         except Exception as e:
             logger.error(f"Error setting up LLM: {e}")
             raise
 
     def _setup_prompt(self):
-        """Initialize the prompt template and chain"""
-        self.prompt = PromptTemplate(
-            template=PROMPT_TEMPLATE,
-            input_variables=["context", "question"]
-        )
-        self.chain = LLMChain(
-            llm=self.llm,
-            prompt=self.prompt,
-            verbose=True
-        )
+        """Initialize the pre-bound prompt formatter"""
+        # Plain str.format skips LangChain's per-call template validation and chain callbacks
+        self._format_prompt = PROMPT_TEMPLATE.format
 
     def _load_knowledge_base(self):
         """Load initial knowledge base content"""
         try:
             # Use absolute path for better debugging
-            kb_path = Path("data/knowledge_base/about.txt").absolute()
-            logger.info(f"Attempting to load knowledge base from: {kb_path}")
+            kb_dir = Path("data/knowledge_base").absolute()
+            logger.info(f"Attempting to load knowledge base from: {kb_dir}")
             
-            if not kb_path.exists():
-                logger.error(f"Knowledge base file not found at {kb_path}")
+            kb_files = []
+            if kb_dir.is_dir():
+                with os.scandir(kb_dir) as entries:
+                    kb_files = sorted(
+                        Path(entry.path) for entry in entries
+                        if entry.is_file() and entry.name.endswith(".txt")
+                    )
+            if not kb_files:
+                logger.error(f"No knowledge base files found in {kb_dir}")
                 return
-            
-            with open(kb_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                logger.info(f"Loaded content length: {len(content)}")
-                logger.info(f"Content preview: {content[:100]}...")
 
-            if not content:
-                logger.error("Knowledge base file is empty")
+            # Skip re-embedding when the stored vectors were built from these exact files
+            # with the same embedding model, chunking and index configuration
+            config = (
+                EMBEDDING_MODEL_NAME, settings.EMBEDDING_INT8,
+                CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_SEPARATORS,
+                sorted(COLLECTION_METADATA.items())
+            )
+            digest = hashlib.sha256(f"{config!r}\n".encode("utf-8"))
+            for kb_path in kb_files:
+                digest.update(kb_path.name.encode("utf-8") + b"\0")
+                with kb_path.open("rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(block)
+            kb_hash = digest.hexdigest()
+            hash_path = Path(settings.VECTOR_STORE_PATH) / KB_HASH_FILE
+            if (
+                hash_path.exists()
+                and hash_path.read_text().strip() == kb_hash
+                and self.vector_store._collection.count() > 0
+            ):
+                logger.info("Knowledge base unchanged, reusing stored embeddings")
                 return
 
-            # Split content into smaller chunks
-            chunks = self.text_splitter.split_text(content)
-            logger.info(f"Split content into {len(chunks)} chunks")
-
             # Clear existing data
             self.vector_store.delete_collection()
             self.vector_store = Chroma(
                 persist_directory=str(Path(settings.VECTOR_STORE_PATH)),
-                embedding_function=self.embeddings
+                embedding_function=self.embeddings,
+                collection_metadata=COLLECTION_METADATA
             )
 
-            # Add chunks to vector store
-            for i, chunk in enumerate(chunks):
-                self.vector_store.add_texts(
-                    texts=[chunk],
-                    metadatas=[{
-                        "source": "about.txt",
-                        "chunk_index": i,
-                        "total_chunks": len(chunks)
-                    }]
-                )
-                logger.info(f"Added chunk {i+1}/{len(chunks)}")
+            # Process one file at a time so only a single file's chunks are held in memory
+            total_added = 0
+            for kb_path in kb_files:
+                content = kb_path.read_text(encoding="utf-8").strip()
+                if not content:
+                    logger.warning(f"Knowledge base file is empty: {kb_path.name}")
+                    continue
+
+                chunks = self.text_splitter.split_text(content)
+                del content
+                logger.info(f"Split {kb_path.name} into {len(chunks)} chunks")
+
+                # Embed and add each block of chunks in a single batch
+                for start in range(0, len(chunks), KB_BLOCK_SIZE):
+                    block = chunks[start:start + KB_BLOCK_SIZE]
+                    self.vector_store.add_texts(
+                        texts=block,
+                        metadatas=[
+                            {
+                                "source": kb_path.name,
+                                "chunk_index": start + i,
+                                "total_chunks": len(chunks)
+                            }
+                            for i in range(len(block))
+                        ]
+                    )
+                total_added += len(chunks)
+
+            if not total_added:
+                logger.error("Knowledge base files are empty")
+                return
+            logger.info(f"Added {total_added} chunks")
 
             # Verify data was loaded
-            collection_size = len(self.vector_store.get())
+            collection_size = self.vector_store._collection.count()
             logger.info(f"Total documents in vector store: {collection_size}")
+
+            # Answers saved against the old content may no longer hold
+            hash_path.write_text(kb_hash)
+            (Path(settings.VECTOR_STORE_PATH) / ANSWER_CACHE_FILE).unlink(missing_ok=True)
             
         except Exception as e:
             logger.error(f"Error loading knowledge base: {e}", exc_info=True)
             raise
 
     async def add_document(self, content: str, metadata: Optional[Dict] = None) -> bool:
+        """Add a document to the vector store without blocking the event loop"""
+        return await asyncio.to_thread(self.add_document_sync, content, metadata)
+
+    def add_document_sync(self, content: str, metadata: Optional[Dict] = None) -> bool:
         """Add a document to the vector store with proper chunking"""
+        return self.add_documents_sync([content], [metadata])[0]
+
+    async def add_documents(
+        self,
+        contents: List[str],
+        metadatas: Optional[List[Optional[Dict]]] = None
+    ) -> List[bool]:
+        """Add several documents without blocking the event loop"""
+        return await asyncio.to_thread(self.add_documents_sync, contents, metadatas)
+
+    def add_documents_sync(
+        self,
+        contents: List[str],
+        metadatas: Optional[List[Optional[Dict]]] = None
+    ) -> List[bool]:
+        """Chunk several documents and embed their chunks together, returning which were added"""
         try:
-            logger.info("Adding new document to vector store...")
-            
-            # Split the document into chunks
-            chunks = self.text_splitter.split_text(content)
-            
-            # Add metadata to each chunk if provided
-            if metadata:
-                chunk_metadata = [metadata.copy() for _ in chunks]
-            else:
-                chunk_metadata = [{}] * len(chunks)
-            
-            # Add chunk index to metadata
-            for i, meta in enumerate(chunk_metadata):
-                meta['chunk_index'] = i
-                meta['total_chunks'] = len(chunks)
-            
-            # Add chunks to vector store
-            self.vector_store.add_texts(
-                texts=chunks,
-                metadatas=chunk_metadata
+            logger.info(f"Adding {len(contents)} new document(s) to vector store...")
+            documents = [
+                self._chunk_document(content, metadata)
+                for content, metadata in zip(contents, metadatas or [None] * len(contents))
+            ]
+        except Exception as e:
+            logger.error(f"Error splitting documents: {e}")
+            return [False] * len(contents)
+
+        try:
+            self._add_chunks(
+                [text for texts, _, _ in documents for text in texts],
+                [meta for _, metas, _ in documents for meta in metas],
+                [chunk_id for _, _, ids in documents for chunk_id in ids]
             )
-            
-            logger.info(f"Successfully added {len(chunks)} chunks to vector store")
-            return True
-            
+            added = [True] * len(documents)
         except Exception as e:
-            logger.error(f"Error adding document: {e}")
-            return False
+            # Retry each document on its own so one bad upload doesn't sink the batch;
+            # chunk ids are reused so blocks already written are overwritten, not duplicated
+            logger.warning(f"Error adding documents, retrying one at a time: {e}")
+            added = []
+            for texts, metas, ids in documents:
+                try:
+                    self._add_chunks(texts, metas, ids)
+                    added.append(True)
+                except Exception as doc_error:
+                    logger.error(f"Error adding document: {doc_error}")
+                    added.append(False)
+
+        if any(added):
+            self.clear_answer_cache()
+        logger.info(f"Added {sum(added)} of {len(documents)} document(s) to vector store")
+        return added
+
+    def _chunk_document(
+        self,
+        content: str,
+        metadata: Optional[Dict]
+    ) -> Tuple[List[str], List[Dict], List[str]]:
+        """Split a document into chunks with per-chunk metadata and ids"""
+        chunks = self.text_splitter.split_text(content)
+        doc_id = uuid.uuid4().hex
+        
+        # Add metadata and chunk index to each chunk
+        chunk_metadata = []
+        for i in range(len(chunks)):
+            meta = metadata.copy() if metadata else {}
+            meta['chunk_index'] = i
+            meta['total_chunks'] = len(chunks)
+            chunk_metadata.append(meta)
+        return chunks, chunk_metadata, [f"{doc_id}-{i}" for i in range(len(chunks))]
+
+    def _add_chunks(self, texts: List[str], metadatas: List[Dict], ids: List[str]):
+        """Embed and add chunks in blocks of KB_BLOCK_SIZE, below Chroma's max batch size"""
+        for start in range(0, len(texts), KB_BLOCK_SIZE):
+            end = start + KB_BLOCK_SIZE
+            self.vector_store.add_texts(
+                texts=texts[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
 
     def _calculate_confidence(self, similarities: List[float]) -> float:
         """Calculate confidence score based on similarity scores"""
@@ -214,29 +483,151 @@ class EnhancedRAGSystem:
             return 0.0
         
         # Weight recent similarities more heavily
-        weights = np.exp(np.linspace(-1, 0, len(similarities)))
-        weighted_similarities = np.array(similarities) * weights
-        
-        # Calculate confidence score
-        confidence = float(np.mean(weighted_similarities))
+        k = len(similarities)
+        weights = CONFIDENCE_WEIGHTS.get(k)
+        if weights is None:
+            weights = np.exp(np.linspace(-1, 0, k)).astype(np.float32)
         
-        return confidence
+        # Mean of the weighted similarities as a single dot product
+        return float(np.dot(np.asarray(similarities, dtype=np.float32), weights) / k)
+
+    def _get_llm_lock(self) -> asyncio.Lock:
+        """Return the generation lock, creating it on the running event loop"""
+        if self._llm_lock is None:
+            self._llm_lock = asyncio.Lock()
+        return self._llm_lock
 
-    async def query(self, question: str, confidence_threshold: float = 0.3) -> Dict:
+    def _search_batch(self, questions: List[str]) -> List[SearchResult]:
+        """Embed all questions at once and retrieve their chunks in one vector store query"""
+        vectors = self.embeddings.embed_documents(questions)
+        result = self.vector_store._collection.query(
+            query_embeddings=vectors,
+            n_results=RETRIEVAL_K,
+            # query() only reads chunk text and scores, so skip fetching metadata
+            include=["documents", "distances"]
+        )
+        return [
+            (
+                np.asarray(vector, dtype=np.float32),
+                [
+                    # Cosine distance is half the squared L2 distance between unit
+                    # vectors; rescale so confidence thresholds keep their meaning
+                    (Document(page_content=text), 2 * distance)
+                    for text, distance in zip(texts, distances)
+                ]
+            )
+            for vector, texts, distances in zip(
+                vectors, result["documents"], result["distances"]
+            )
+        ]
+
+    def _lookup_answer(self, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Find a cached answer for a near-identical question"""
+        if not self._answers:
+            return None
+        # Another process (e.g. the admin app) may have added documents since these
+        # answers were generated; the collection size is the shared signal
+        if self.vector_store._collection.count() != self._answers_collection_size:
+            logger.info("Vector store changed, clearing cached answers")
+            self.clear_answer_cache()
+            return None
+        if self._answer_matrix is None:
+            self._answer_keys = list(self._answers)
+            self._answer_matrix = np.stack([vec for vec, _, _ in self._answers.values()])
+        similarities = self._answer_matrix @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < ANSWER_MATCH_THRESHOLD:
+            return None
+        key = self._answer_keys[best]
+        self._answers.move_to_end(key)
+        _, answer, confidence = self._answers[key]
+        return answer, confidence
+
+    def _store_answer(self, question: str, vector: np.ndarray, answer: str, confidence: float):
+        """Remember a generated answer, evicting the least recently used one"""
+        self._answers[question] = (vector, answer, confidence)
+        self._answers.move_to_end(question)
+        if len(self._answers) > ANSWER_CACHE_SIZE:
+            self._answers.popitem(last=False)
+        self._answer_matrix = None
+
+    def has_digest(self, digest: str) -> bool:
+        """Check whether an upload with this SHA-256 digest is in the vector store"""
+        found = self.vector_store._collection.get(where={"digest": digest}, limit=1, include=[])
+        return bool(found["ids"])
+
+    def clear_answer_cache(self):
+        """Forget cached answers, in memory and on disk, e.g. after the knowledge base changes"""
+        self._answers = OrderedDict()
+        self._answer_matrix = None
+        self._answers_collection_size = self.vector_store._collection.count()
+        (Path(settings.VECTOR_STORE_PATH) / ANSWER_CACHE_FILE).unlink(missing_ok=True)
+
+    def _load_answer_cache(self):
+        """Restore cached answers saved by a previous run"""
+        path = Path(settings.VECTOR_STORE_PATH) / ANSWER_CACHE_FILE
+        if not path.exists():
+            return
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                # Documents added since the save (e.g. by the admin app) may change answers
+                if int(data["collection_size"]) != self._answers_collection_size:
+                    logger.info("Vector store changed since answers were cached, discarding them")
+                    path.unlink(missing_ok=True)
+                    return
+                for question, vector, answer, confidence in zip(
+                    data["questions"], data["vectors"], data["answers"], data["confidences"]
+                ):
+                    self._answers[str(question)] = (vector, str(answer), float(confidence))
+            logger.info(f"Loaded {len(self._answers)} cached answers")
+        except Exception as e:
+            logger.warning(f"Could not load answer cache: {e}")
+
+    def save_answer_cache(self):
+        """Persist cached answers beside the vector store"""
+        if not self._answers:
+            return
+        try:
+            entries = list(self._answers.items())
+            np.savez(
+                Path(settings.VECTOR_STORE_PATH) / ANSWER_CACHE_FILE,
+                questions=np.array([question for question, _ in entries]),
+                vectors=np.stack([vec for _, (vec, _, _) in entries]),
+                answers=np.array([answer for _, (_, answer, _) in entries]),
+                confidences=np.array([conf for _, (_, _, conf) in entries], dtype=np.float32),
+                collection_size=np.array(self._answers_collection_size)
+            )
+        except Exception as e:
+            logger.error(f"Error saving answer cache: {e}")
+
+    async def query(
+        self,
+        question: str,
+        confidence_threshold: float = 0.3,
+        use_cache: bool = True
+    ) -> Dict:
         """Query the RAG system with confidence scoring"""
         try:
             logger.info(f"Processing query: {question}")
             
-            # Get relevant documents and their similarity scores
-            docs_and_scores = self.vector_store.similarity_search_with_score(
-                question,
-                k=3  # Get top 3 most relevant chunks
-            )
+            # Get relevant documents and their similarity scores, batched with concurrent queries
+            vector, docs_and_scores = await self._batcher.search(question)
+
+            # Reuse the answer to a near-identical earlier question. Callers pass
+            # use_cache=False for templated prompts, whose embeddings are dominated by
+            # the shared template text and would wrongly match each other
+            cached = self._lookup_answer(vector) if use_cache else None
+            if cached and cached[1] >= confidence_threshold:
+                logger.info("Answered from semantic cache")
+                return {
+                    "answer": cached[0],
+                    "confidence": cached[1]
+                }
             
             if not docs_and_scores:
                 logger.warning("No relevant documents found")
                 return {
-                    "answer": "I don't have enough information to answer this question accurately.",
+                    "answer": NO_CONTEXT_ANSWER,
                     "confidence": 0.0
                 }
             
@@ -256,7 +647,7 @@ class EnhancedRAGSystem:
             if confidence < confidence_threshold:
                 logger.warning(f"Confidence {confidence} below threshold {confidence_threshold}")
                 return {
-                    "answer": "While I have some information, I'm not confident enough to provide an accurate answer to this question.",
+                    "answer": LOW_CONFIDENCE_ANSWER,
                     "confidence": confidence
                 }
             
@@ -264,23 +655,27 @@ class EnhancedRAGSystem:
             context = "\n\n".join(doc.page_content for doc in docs)
             logger.info(f"Combined context length: {len(context)}")
             
-            # Generate answer using LLM
-            response = self.chain.run(
-                context=context,
-                question=question
-            )
+            # Generate answer using LLM off the event loop
+            async with self._get_llm_lock():
+                response = await asyncio.to_thread(
+                    self.llm.invoke,
+                    self._format_prompt(context=context, question=question)
+                )
             
             logger.info(f"Generated response: {response[:100]}...")
+            answer = response.strip()
+            if use_cache:
+                self._store_answer(question, vector, answer, confidence)
             
             return {
-                "answer": response.strip(),
+                "answer": answer,
                 "confidence": confidence
             }
             
         except Exception as e:
             logger.error(f"Error processing query: {e}", exc_info=True)
             return {
-                "answer": "Sorry, I encountered an error while processing your question. Please try again later.",
+                "answer": ERROR_ANSWER,
                 "confidence": 0.0
             }
 
@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable
+import hashlib
+import os
+import re
+import threading
+import orjson
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+# Where uploaded documents are stored
+UPLOAD_DIR = Path("data/uploads")
+
+# Uploads are stored under their SHA-256 digest; this index maps each digest
+# to the original filename and upload details
+UPLOAD_INDEX_PATH = UPLOAD_DIR / "index.json"
+
+# Sidecar file locked around index updates so the admin app and the Telegram
+# bot, which run as separate processes, don't drop each other's entries
+UPLOAD_INDEX_LOCK_PATH = UPLOAD_DIR / "index.lock"
+
+# Characters kept from client-supplied filenames
+UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+# flock is per open file description, so threads of one process also need a lock
+_index_lock = threading.Lock()
+
+def secure_filename(filename: str) -> str:
+    """Strip directories and unsafe characters from a client-supplied filename"""
+    return UNSAFE_FILENAME_CHARS.sub("_", Path(filename or "").name) or "upload"
+
+def stored_name(digest: str, filename: str) -> str:
+    """Name an upload is stored under in the uploads directory"""
+    return f"{digest}{Path(filename).suffix.lower()}"
+
+def index_mtime() -> int:
+    """Modification time of the upload index, or 0 if it doesn't exist yet"""
+    try:
+        return UPLOAD_INDEX_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def read_index() -> Dict[str, Dict]:
+    """Load the upload index from disk"""
+    try:
+        return orjson.loads(UPLOAD_INDEX_PATH.read_bytes())
+    except FileNotFoundError:
+        return {}
+
+def write_index(index: Dict[str, Dict]):
+    """Atomically replace the upload index on disk"""
+    tmp_path = UPLOAD_INDEX_PATH.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(orjson.dumps(index))
+    os.replace(tmp_path, UPLOAD_INDEX_PATH)
+
+@contextmanager
+def _locked_index():
+    """Hold the index lock across processes and threads, yielding the current index"""
+    with _index_lock:
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        with open(UPLOAD_INDEX_LOCK_PATH, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield read_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def record_uploads(entries: Iterable[Dict]) -> Dict[str, Dict]:
+    """Merge entries into the index on disk and return the updated index"""
+    with _locked_index() as index:
+        for entry in entries:
+            index[entry["digest"]] = entry
+        write_index(index)
+        return index
+
+def remove_uploads(digests: Iterable[str]) -> Dict[str, Dict]:
+    """Delete uploads and their index entries, returning the updated index"""
+    with _locked_index() as index:
+        for digest in digests:
+            entry = index.pop(digest, None)
+            if entry is not None:
+                (UPLOAD_DIR / entry["stored_as"]).unlink(missing_ok=True)
+        write_index(index)
+        return index
+
+def backfill_index() -> Dict[str, Dict]:
+    """Index documents saved to the uploads directory before it had an index"""
+    with _locked_index() as index:
+        indexed = {entry["stored_as"] for entry in index.values()}
+        added = False
+        for path in sorted(UPLOAD_DIR.glob("*.*")):
+            if (
+                not path.is_file()
+                or path.name.startswith(".")
+                or path.name in indexed
+                or path in (UPLOAD_INDEX_PATH, UPLOAD_INDEX_LOCK_PATH)
+                or path.suffix == ".tmp"
+            ):
+                continue
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if digest in index:
+                continue
+            stat = path.stat()
+            index[digest] = {
+                "title": path.name,
+                "description": "",
+                "filename": path.name,
+                "uploaded_by": "",
+                "digest": digest,
+                "stored_as": path.name,
+                "size": stat.st_size,
+                "modified": stat.st_mtime,
+                # Embedded without a digest in its chunk metadata, so it can't be
+                # checked against the vector store
+                "legacy": True
+            }
+            added = True
+        if added:
+            write_index(index)
+        return index
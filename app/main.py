@@ -1,17 +1,15 @@
 from app.bots.telegram_bot import SuperteamBot
+from app.core.config import settings
 import logging
 
 def main():
-    # Set up logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # Logging is configured when app.core.config is imported
     logger = logging.getLogger(__name__)
 
     try:
         # Initialize and run the bot
         logger.info("Starting Superteam Vietnam Bot...")
+        settings.validate_paths()
         bot = SuperteamBot()
         bot.run()
     except Exception as e:
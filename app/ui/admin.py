@@ -1,33 +1,250 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Form, Request
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import secrets
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import codecs
+import functools
+import hashlib
+import hmac
+import os
+import time
+import uuid
+import orjson
 import logging
 from ..core.config import settings
-from ..core.rag import RAGSystem
+from ..core.rag import EnhancedRAGSystem
+from ..core.uploads import (
+    UPLOAD_DIR, backfill_index, index_mtime, read_index, record_uploads, remove_uploads,
+    secure_filename, stored_name
+)
 
-app = FastAPI()
+# Compiled templates are cached on disk so restarts skip parsing and compiling
+TEMPLATE_CACHE_DIR = Path("data/.jinja_cache")
+TEMPLATE_DIR = Path("app/ui/templates")
+
+app = FastAPI(default_response_class=ORJSONResponse)
 security = HTTPBasic()
-templates = Jinja2Templates(directory="app/ui/templates")
+templates = Jinja2Templates(env=Environment(
+    loader=FileSystemLoader(str(TEMPLATE_DIR)),
+    bytecode_cache=FileSystemBytecodeCache(directory=str(TEMPLATE_CACHE_DIR)),
+    auto_reload=False,
+    autoescape=True
+))
 
-# Initialize RAG system
-rag_system = RAGSystem()
+# Initialized at startup so model loading doesn't block the event loop
+rag_system: Optional[EnhancedRAGSystem] = None
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Upper bound on threads used by asyncio.to_thread for model work
+BLOCKING_THREADS = 8
+
+# Upload and index disk I/O gets its own small pool so it can't starve, or be
+# starved by, embedding work on the default executor
+IO_THREADS = 4
+_IO_POOL = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="admin-io")
+
+# In-memory copy of the upload index, and the index file's mtime when it was read
+_upload_index: Dict[str, Dict] = {}
+_upload_index_mtime = 0
+# Created at startup so it binds to the server's event loop
+_index_lock: Optional[asyncio.Lock] = None
+# /documents body and its ETag, re-encoded only when the index changes
+_documents_json = b'{"documents":[]}'
+_documents_etag = '"empty"'
+# Templates aren't reloaded after startup, so the panel's ETag is fixed then
+_panel_etag = '""'
+
+# Uploads embedded together per vector store call, and seconds the ingest
+# worker waits for more uploads before embedding a batch
+INGEST_BATCH_SIZE = 32
+INGEST_BATCH_WAIT = 0.2
+# Uploads waiting for ingestion before /upload waits for room in the queue
+INGEST_QUEUE_SIZE = 256
+# Seconds shutdown waits for queued uploads to be ingested
+INGEST_DRAIN_TIMEOUT = 30
+_ingest_queue: Optional[asyncio.Queue] = None
+_ingest_task: Optional[asyncio.Task] = None
+# Digests queued for ingestion but not yet in the index
+_pending_digests: Set[str] = set()
+
+# Text formats the RAG system can ingest (matching the Telegram /upload command)
+ALLOWED_EXTENSIONS = frozenset({".txt", ".md"})
+ALLOWED_CONTENT_TYPES = frozenset({
+    "text/plain", "text/markdown", "text/x-markdown", "application/octet-stream"
+})
+
+# Bytes read from an upload per chunk when streaming it to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Digest of the expected "username\0password", compared in one constant-time check
+ADMIN_CREDENTIALS_DIGEST = hashlib.sha256(
+    b"admin\0" + settings.ADMIN_PASSWORD.encode("utf8")
+).digest()
+
+@app.on_event("startup")
+async def startup():
+    """Create data directories and load the RAG system before serving requests"""
+    global rag_system, _index_lock, _ingest_queue, _ingest_task, _panel_etag
+    _index_lock = asyncio.Lock()
+    _ingest_queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=BLOCKING_THREADS, thread_name_prefix="admin")
+    )
+    settings.validate_paths()
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    TEMPLATE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _panel_etag = f'"{max(p.stat().st_mtime_ns for p in TEMPLATE_DIR.rglob("*.html")):x}"'
+    rag_system = await EnhancedRAGSystem.create()
+    index = await _run_io(backfill_index)
+    # Delete uploads whose chunks are gone, e.g. after the knowledge base was rebuilt
+    stale = await asyncio.to_thread(lambda: [
+        digest for digest, entry in index.items()
+        if not entry.get("legacy") and not rag_system.has_digest(digest)
+    ])
+    if stale:
+        logger.info("Removing %d upload(s) missing from the vector store", len(stale))
+        await _run_io(remove_uploads, stale)
+    await _reload_index()
+    _ingest_task = asyncio.create_task(_ingest_worker())
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Finish queued ingestion, then stop the worker and discard anything left over"""
+    if _ingest_task is None:
+        return
+    try:
+        await asyncio.wait_for(_ingest_queue.join(), INGEST_DRAIN_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning("Ingestion queue not drained after %ds, stopping", INGEST_DRAIN_TIMEOUT)
+    _ingest_task.cancel()
+    try:
+        await _ingest_task
+    except asyncio.CancelledError:
+        pass
+    # Stored files that never made it into the vector store would otherwise be orphaned
+    while not _ingest_queue.empty():
+        _, _, entry = _ingest_queue.get_nowait()
+        (UPLOAD_DIR / entry["stored_as"]).unlink(missing_ok=True)
+    _IO_POOL.shutdown(wait=True)
+
+async def _run_io(func, *args, **kwargs):
+    """Run blocking disk I/O on the dedicated I/O pool"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _IO_POOL, functools.partial(func, *args, **kwargs)
+    )
+
+def _refresh_documents():
+    """Re-encode the /documents response body and ETag from the upload index"""
+    global _documents_json, _documents_etag
+    _documents_json = orjson.dumps({"documents": list(_upload_index.values())})
+    _documents_etag = f'"{hashlib.blake2b(_documents_json, digest_size=8).hexdigest()}"'
+
+async def _reload_index():
+    """Re-read the upload index if another process has written it since it was loaded"""
+    global _upload_index, _upload_index_mtime
+    async with _index_lock:
+        mtime = await _run_io(index_mtime)
+        if mtime != _upload_index_mtime:
+            _upload_index = await _run_io(read_index)
+            _upload_index_mtime = mtime
+            _refresh_documents()
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match already names this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+async def _stream_to_disk(file: UploadFile, file_path: Path) -> Tuple[str, str, int]:
+    """Copy an upload to disk chunk by chunk, returning its text, SHA-256 digest and size"""
+    total = 0
+    digest = hashlib.sha256()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parts = []
+    out = await _run_io(open, file_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            total += len(chunk)
+            # Abort as soon as the running total passes the limit
+            if total > settings.MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="File too large")
+            await _run_io(out.write, chunk)
+            digest.update(chunk)
+            parts.append(decoder.decode(chunk))
+    except BaseException:
+        await _run_io(out.close)
+        file_path.unlink(missing_ok=True)
+        raise
+    await _run_io(out.close)
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts), digest.hexdigest(), total
+
+async def _ingest_batch(batch: List[Tuple[str, Dict, Dict]]):
+    """Embed a batch of uploads together and add the ones that succeed to the upload index"""
+    global _upload_index, _upload_index_mtime
+    try:
+        added = await rag_system.add_documents(
+            [text for text, _, _ in batch],
+            [metadata for _, metadata, _ in batch]
+        )
+
+        # Failed uploads are deleted so they aren't left on disk outside the index
+        entries = []
+        for (_, _, entry), ok in zip(batch, added):
+            if ok:
+                entries.append(entry)
+            else:
+                logger.error("Failed to process uploaded document %s", entry["filename"])
+                await _run_io((UPLOAD_DIR / entry["stored_as"]).unlink, missing_ok=True)
+        if not entries:
+            return
+
+        async with _index_lock:
+            _upload_index = await _run_io(record_uploads, entries)
+            _upload_index_mtime = await _run_io(index_mtime)
+            _refresh_documents()
+    except Exception as e:
+        logger.error("Error ingesting uploaded documents: %s", e)
+    finally:
+        for _, _, entry in batch:
+            _pending_digests.discard(entry["digest"])
+
+async def _ingest_worker():
+    """Drain queued uploads in batches of up to INGEST_BATCH_SIZE"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _ingest_queue.get()]
+        deadline = loop.time() + INGEST_BATCH_WAIT
+        while len(batch) < INGEST_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_ingest_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        try:
+            await _ingest_batch(batch)
+        finally:
+            for _ in batch:
+                _ingest_queue.task_done()
+
 def get_current_admin(credentials: HTTPBasicCredentials = Depends(security)):
     """Verify admin credentials"""
-    correct_username = "admin"
-    correct_password = settings.ADMIN_PASSWORD
+    supplied = hashlib.sha256(
+        credentials.username.encode("utf8") + b"\0" + credentials.password.encode("utf8")
+    ).digest()
     
-    is_correct_username = secrets.compare_digest(credentials.username.encode("utf8"), correct_username.encode("utf8"))
-    is_correct_password = secrets.compare_digest(credentials.password.encode("utf8"), correct_password.encode("utf8"))
-    
-    if not (is_correct_username and is_correct_password):
+    if not hmac.compare_digest(supplied, ADMIN_CREDENTIALS_DIGEST):
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
@@ -36,69 +253,105 @@ def get_current_admin(credentials: HTTPBasicCredentials = Depends(security)):
     return credentials.username
 
 @app.get("/", response_class=HTMLResponse)
-async def admin_panel(admin: str = Depends(get_current_admin)):
+async def admin_panel(request: Request, admin: str = Depends(get_current_admin)):
     """Admin panel homepage"""
+    headers = {"ETag": _panel_etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, _panel_etag):
+        return Response(status_code=304, headers=headers)
     return templates.TemplateResponse(
+        request,
         "admin.html",
-        {"request": {}, "title": "Superteam Vietnam Admin Panel"}
+        {"title": "Superteam Vietnam Admin Panel"},
+        headers=headers
     )
 
-@app.post("/upload")
+@app.post("/upload", status_code=202)
 async def upload_document(
     file: UploadFile = File(...),
     title: str = Form(...),
     description: str = Form(...),
     admin: str = Depends(get_current_admin)
 ):
-    """Handle document uploads"""
+    """Save an upload and queue it for batched ingestion"""
+    # Reject unsupported or oversized uploads before touching disk
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+    if (
+        Path(file.filename or "").suffix.lower() not in ALLOWED_EXTENSIONS
+        or (content_type and content_type not in ALLOWED_CONTENT_TYPES)
+    ):
+        raise HTTPException(status_code=415, detail="Only .txt and .md files are supported")
+    if file.size is not None and file.size > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
     try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = Path("data/uploads")
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Save file
-        file_path = upload_dir / file.filename
-        content = await file.read()
-        
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
-        # Process with RAG system
-        with open(file_path, "r", encoding="utf-8") as f:
-            text_content = f.read()
-        
-        metadata = {
-            "title": title,
-            "description": description,
-            "filename": file.filename,
-            "uploaded_by": admin
-        }
-        
-        success = await rag_system.add_document(text_content, metadata)
-        
-        if success:
-            return {"message": "Document uploaded and processed successfully"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to process document")
+        # Stream the file to a temporary name, decoding its text on the way through
+        filename = secure_filename(file.filename)
+        tmp_path = UPLOAD_DIR / f".{uuid.uuid4().hex}.part"
+        text_content, digest, size = await _stream_to_disk(file, tmp_path)
+
+        # Identical content is stored and embedded only once. The digest is
+        # reserved before any await so a concurrent upload can't slip past.
+        if digest in _pending_digests:
+            await _run_io(tmp_path.unlink, missing_ok=True)
+            return {"message": "Document already uploaded"}
+        _pending_digests.add(digest)
+
+        queued = False
+        try:
+            # The vector store, not the index, decides whether it's already embedded
+            if await asyncio.to_thread(rag_system.has_digest, digest):
+                await _run_io(tmp_path.unlink, missing_ok=True)
+                return {"message": "Document already uploaded"}
+
+            stored_as = stored_name(digest, filename)
+            await _run_io(os.replace, tmp_path, UPLOAD_DIR / stored_as)
             
+            metadata = {
+                "title": title,
+                "description": description,
+                "filename": filename,
+                "uploaded_by": admin,
+                "digest": digest
+            }
+            
+            entry = {
+                **metadata,
+                "stored_as": stored_as,
+                "size": size,
+                "modified": time.time()
+            }
+            await _ingest_queue.put((text_content, metadata, entry))
+            queued = True
+        finally:
+            if not queued:
+                _pending_digests.discard(digest)
+
+        return {"message": "Document uploaded and queued for processing"}
+            
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error uploading document: {e}")
+        logger.error("Error uploading document: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/documents")
-async def list_documents(admin: str = Depends(get_current_admin)):
-    """List all uploaded documents"""
+async def list_documents(request: Request, admin: str = Depends(get_current_admin)):
+    """List all uploaded documents from the precomputed upload index body"""
     try:
-        documents = []
-        upload_dir = Path("data/uploads")
-        if upload_dir.exists():
-            for file_path in upload_dir.glob("*.*"):
-                documents.append({
-                    "filename": file_path.name,
-                    "size": file_path.stat().st_size,
-                    "modified": file_path.stat().st_mtime
-                })
-        return {"documents": documents}
+        # Picks up documents uploaded through the Telegram bot
+        await _reload_index()
+        headers = {"ETag": _documents_etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request, _documents_etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=_documents_json, media_type="application/json", headers=headers)
     except Exception as e:
-        logger.error(f"Error listing documents: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.error("Error listing documents: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+def run():
+    """Serve the admin panel; uvicorn's "auto" picks uvloop and httptools when installed"""
+    import uvicorn
+    uvicorn.run(app, host=settings.ADMIN_HOST, port=settings.ADMIN_PORT, loop="auto", http="auto")
+
+if __name__ == "__main__":
+    run()
@@ -5,9 +5,34 @@ setup(
     version="0.1",
     packages=find_packages(),
     install_requires=[
-        "python-telegram-bot",
-        "python-dotenv",
-        "langchain",
-        "chromadb",
+        # Core dependencies
+        "fastapi==0.109.0",
+        "uvicorn==0.27.0",
+        "uvloop==0.19.0; sys_platform != 'win32'",
+        "httptools==0.6.1",
+        "python-dotenv==1.0.0",
+        "pydantic==2.5.3",
+        "pydantic-settings==2.1.0",
+        # LLM and RAG
+        "langchain==0.0.352",
+        "langchain-community==0.0.9",
+        "chromadb==0.4.22",
+        "sentence-transformers==2.2.2",
+        "transformers==4.36.2",
+        "torch==2.1.2",
+        "huggingface-hub==0.20.2",
+        "numpy==1.26.3",
+        "llama-cpp-python==0.2.23",
+        # Bot frameworks
+        "python-telegram-bot==20.7",
+        "tweepy[async]==4.14.0",
+        # Database
+        "SQLAlchemy==2.0.25",
+        "aiosqlite==0.19.0",
+        # Utils
+        "python-multipart==0.0.6",
+        "jinja2==3.1.3",
+        "orjson==3.9.10",
+        "loguru==0.7.2",
     ],
-)
\ No newline at end of file
+)